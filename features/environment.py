@@ -7,7 +7,23 @@ This file provides setup for machine environment for our testing pipeline.
 import sys
 import traceback
 from qecore.sandbox import TestSandbox
-from qecore.utility import run
+
+from helpers.startup import StartupProfile  # pylint: disable=import-error
+from helpers.apps import ApplicationRegistry  # pylint: disable=import-error
+from helpers.listener import AccessibilityListener  # pylint: disable=import-error
+from helpers.cache import NodeCache  # pylint: disable=import-error
+from helpers.reader import TerminalText  # pylint: disable=import-error
+from helpers.selector import RoleIndex  # pylint: disable=import-error
+from helpers.dconf import DconfReader  # pylint: disable=import-error
+from helpers.state import DconfState  # pylint: disable=import-error
+from helpers.profiles import ProfileFixtures  # pylint: disable=import-error
+from helpers.retry import RetryBudget  # pylint: disable=import-error
+from helpers.timing import StepTimer  # pylint: disable=import-error
+from helpers.shell import ShellIntegration  # pylint: disable=import-error
+from helpers.preferences import PreferencesSession  # pylint: disable=import-error
+from helpers.requirements import Requirements  # pylint: disable=import-error
+
+BENCHMARK_TAG = "benchmark_feature"
 
 
 def before_all(context) -> None:
@@ -16,27 +32,139 @@ def before_all(context) -> None:
     """
 
     try:
+        # Time since the process started, imports of behave, hooks and steps included.
+        context.startup = StartupProfile(
+            context.config.userdata.getbool("profile_startup")
+        )
+
+        # Wall time of steps and scenario phases, see 'timing_output' in behave.ini.
+        context.timing = StepTimer(context.config.userdata.get("timing_output", ""))
+
         context.sandbox = TestSandbox("gnome-terminal", context=context)
         context.sandbox.attach_faf = False
 
-        context.terminal = context.sandbox.get_application(
+        # Handles are created by the sandbox when a step uses the application.
+        context.applications = ApplicationRegistry(context.sandbox)
+
+        context.terminal = context.applications.register(
+            "terminal",
             name="gnome-terminal",
             a11y_app_name="gnome-terminal-server",
             desktop_file_name="org.gnome.Terminal.desktop",
         )
         context.terminal.exit_shortcut = "<Ctrl><Shift><Q>"
 
-        context.preferences = context.sandbox.get_application(
+        context.preferences = context.applications.register(
+            "preferences",
             name="gnome-terminal",
             a11y_app_name="gnome-terminal-preferences",
             desktop_file_name="org.gnome.Terminal.Preferences.desktop",
         )
 
-        context.settings = context.sandbox.get_application(
-            name="gnome-control-center", desktop_file_name="org.gnome.Settings.desktop"
+        context.settings = context.applications.register(
+            "settings",
+            name="gnome-control-center",
+            desktop_file_name="org.gnome.Settings.desktop",
+        )
+
+        context.gedit = context.applications.register("gedit", name="gedit")
+
+        # Steps wait on accessibility events of all registered applications.
+        context.listener = AccessibilityListener(context.applications.a11y_app_names())
+        context.listener.start()
+
+        # Terminal widgets are looked up by every text assertion.
+        context.terminal.node_cache = NodeCache(
+            context.terminal.a11y_app_name, context.listener
+        )
+
+        # Waits for the terminal text read only the changed range of it.
+        context.terminal_text = TerminalText(context.listener)
+
+        # Scenarios start from default Terminal settings, restored by a diff.
+        # Reset is left to the first non leapp scenario, leapp runs keep profiles.
+        context.dconf_state = DconfState(
+            directories=("/org/gnome/terminal/legacy/",),
+            keys=("/org/gtk/settings/debug/enable-inspector-keybinding",),
+        )
+        context.dconf_state.take_snapshot()
+
+        # Profile assertions read typed values in process.
+        context.dconf = DconfReader()
+
+        # Profiles needed only as a precondition are written directly to dconf.
+        context.profiles = ProfileFixtures(context.dconf_state, context.dconf)
+
+        # Opt-in reuse of the terminal server across scenarios.
+        context.warm_terminal = None
+        if context.config.userdata.getbool("warm_terminal"):
+            # Imported only in warm mode, not paid by every invocation.
+            from helpers.pool import (  # pylint: disable=import-error,import-outside-toplevel
+                WarmApplication,
+            )
+
+            context.warm_terminal = WarmApplication(
+                context.terminal, "gnome-terminal-server"
+            )
+            context.warm_terminal.install()
+            # Preferences share the component name, do not let them kill the server.
+            context.preferences.kill_command = "pkill -f gnome-terminal-preferences"
+
+        # Failed scenarios are retried in place instead of repeating the whole run.
+        context.retry = RetryBudget(
+            max_attempts=context.config.userdata.getint("autoretry", 1),
+            max_retries=context.config.userdata.getint("autoretry_budget", 0),
+        )
+
+        # Created by the first benchmark feature, see before_feature.
+        context.benchmark = None
+
+        # Resources of the terminal processes sampled during every scenario.
+        context.resources = None
+        sampling_interval = context.config.userdata.getfloat(
+            "resource_sampling_interval", 0
+        )
+        if sampling_interval > 0:
+            # Imported only with sampling enabled, not paid by every invocation.
+            from helpers.procstat import (  # pylint: disable=import-error,import-outside-toplevel
+                ResourceMonitor,
+            )
+
+            context.resources = ResourceMonitor(
+                {
+                    "gnome-terminal-server": context.terminal,
+                    "gnome-terminal-preferences": context.preferences,
+                },
+                sampling_interval,
+            )
+
+        # Preferences stay open across consecutive steps working in them.
+        context.preferences_session = PreferencesSession()
+
+        # Steps run from other steps are parsed and matched once, with the step hooks.
+        from helpers.compose import (  # pylint: disable=import-error,import-outside-toplevel
+            StepComposer,
         )
 
-        context.gedit = context.sandbox.get_application(name="gedit")
+        context.composer = StepComposer(before_step, after_step)
+
+        # Initial state declared by '@require.*' tags, applied before the start.
+        context.requirements = Requirements(context.terminal)
+
+        # Shells report their prompts and exit statuses, has to precede any start.
+        context.shell = ShellIntegration(
+            context.config.userdata.get("shell_status_file", "")
+        )
+        context.shell.install()
+
+        # Commands are typed unless configured otherwise, see helpers.terminal.
+        context.input_backend = context.config.userdata.get("input_backend", "keys")
+
+        # Log every indexed lookup next to the time of the plain findChildren walk.
+        RoleIndex.measure = context.config.userdata.getbool("measure_lookups")
+
+        context.startup.stop()
+        print(context.startup.summary())
     except Exception as error:  # pylint: disable=broad-except
         print(f"Environment error: before_all: {error}")
         traceback.print_exc(file=sys.stdout)
@@ -45,17 +173,77 @@ def before_all(context) -> None:
         context.failed_setup = traceback.format_exc()
 
 
+def before_feature(context, feature) -> None:
+    """
+    This function will be run before every feature in 'behave' command called.
+    """
+
+    try:
+        # Results of benchmark scenarios compared against the stored baseline.
+        if BENCHMARK_TAG in feature.tags and context.benchmark is None:
+            # Imported only for benchmark features, not paid by every invocation.
+            from helpers.benchmark import (  # pylint: disable=import-error,import-outside-toplevel
+                BenchmarkRecorder,
+            )
+
+            userdata = context.config.userdata
+            context.benchmark = BenchmarkRecorder(
+                output_file=userdata.get("benchmark_output", ""),
+                baseline_file=userdata.get("benchmark_baseline", ""),
+                tolerance=userdata.getfloat("benchmark_tolerance", 0.2),
+                update=userdata.getbool("benchmark_update_baseline"),
+            )
+
+        # Scenarios have to be patched before behave starts running them.
+        for scenario in feature.scenarios:
+            if context.retry.enabled_for(scenario):
+                context.retry.patch(scenario)
+    except Exception as error:  # pylint: disable=broad-except
+        print(f"Environment error: before_feature: {error}")
+        traceback.print_exc(file=sys.stdout)
+
+
 def before_scenario(context, scenario) -> None:
     """
     This function will be run before every scenario in 'behave' command called.
     """
 
     try:
-        # Do no execute cleanup on leapp testing.
-        if "leapp" not in scenario.effective_tags:
-            clean_up_dconf()  # we need this in environment unfortunately
+        # Failed before_all is reported by the sandbox as "Failed setup in Before All",
+        # the helpers created after the failure do not exist.
+        if getattr(context, "failed_setup", None):
+            context.sandbox.before_scenario(context, scenario)
+            return
+
+        context.timing.start_scenario(scenario)
 
-        context.sandbox.before_scenario(context, scenario)
+        with context.timing.phase("setup"):
+            # Do no execute cleanup on leapp testing.
+            # Skipped when the previous scenario already restored the state.
+            if "leapp" not in scenario.effective_tags:
+                with context.timing.phase("dconf cleanup"):
+                    context.dconf_state.reset_or_restore()
+
+            # From now on the scenario may change anything.
+            context.dconf_state.dirty = True
+
+            # Applications are started again, nothing learned from events is valid.
+            context.listener.reset()
+            context.dconf.reset()
+            context.terminal_text.reset()
+            context.shell.before_scenario()
+            context.preferences_session.before_scenario()
+            if context.warm_terminal:
+                context.warm_terminal.before_scenario()
+
+            # Settings and start options, the Background only verifies them.
+            with context.timing.phase("requirements"):
+                context.requirements.apply(context, scenario.effective_tags)
+
+            context.sandbox.before_scenario(context, scenario)
+
+        if context.resources:
+            context.resources.start_scenario()
     except Exception as error:  # pylint: disable=broad-except
         print(f"Environment error: before_scenario: {error}")
         traceback.print_exc(file=sys.stdout)
@@ -68,17 +256,54 @@ def before_scenario(context, scenario) -> None:
         sys.exit(1)
 
 
+def before_step(context, step) -> None:
+    """
+    This function will be run before every step, nested steps included.
+    """
+
+    try:
+        context.timing.start_step(context, step)
+        context.preferences_session.before_step(context, step)
+    except Exception as error:  # pylint: disable=broad-except
+        print(f"Environment error: before_step: {error}")
+
+
+def after_step(context, step) -> None:
+    """
+    This function will be run after every step, nested steps included.
+    """
+
+    try:
+        context.timing.stop_step(step)
+        # Processes started by the step are sampled from now on.
+        if context.resources:
+            context.resources.update_pids()
+    except Exception as error:  # pylint: disable=broad-except
+        print(f"Environment error: after_step: {error}")
+
+
 def after_scenario(context, scenario) -> None:
     """
     This function will be run after every scenario in 'behave' command called.
     """
 
     try:
-        # Do no execute cleanup on leapp testing.
-        if "leapp" not in scenario.effective_tags:
-            clean_up_dconf()  # we need this in environment unfortunately
+        # Sampled until the applications are closed.
+        if context.resources:
+            resources = context.resources.stop_scenario(scenario.name)
+            if resources:
+                context.embed("text", resources, "Resources")
+
+        with context.timing.phase("teardown"):
+            # Do no execute cleanup on leapp testing.
+            if "leapp" not in scenario.effective_tags:
+                with context.timing.phase("dconf cleanup"):
+                    context.dconf_state.restore()
 
-        context.sandbox.after_scenario(context, scenario)
+            context.sandbox.after_scenario(context, scenario)
+            context.requirements.restore()
+
+        context.embed("text/html", context.timing.slowest_steps_html(), "Slowest steps")
     except Exception as error:  # pylint: disable=broad-except
         print(f"Environment error: after_scenario: {error}")
         traceback.print_exc(file=sys.stdout)
@@ -88,10 +313,26 @@ def after_scenario(context, scenario) -> None:
         context.embed("text", traceback.format_exc(), embed_caption)
 
 
-def clean_up_dconf() -> None:
+def after_all(context) -> None:
     """
-    Clean up functions.
+    This function will be run once after all features in 'behave' command called.
     """
 
-    run("dconf reset -f /org/gnome/terminal/legacy/")
-    run("dconf reset /org/gtk/Settings/Debug/enable-inspector-keybinding")
+    try:
+        context.shell.cleanup()
+        print(context.dconf_state.summary())
+        if context.warm_terminal:
+            print(context.warm_terminal.summary())
+        print(context.retry.summary())
+        if context.resources:
+            print(context.resources.summary())
+        print(context.preferences_session.summary())
+        print(context.composer.summary())
+        print(context.applications.summary())
+        print(context.timing.histogram())
+        context.timing.close()
+        if context.benchmark:
+            context.benchmark.save()
+    except Exception as error:  # pylint: disable=broad-except
+        print(f"Environment error: after_all: {error}")
+        traceback.print_exc(file=sys.stdout)
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""
+Helper modules shared by environment.py and the step definitions.
+
+The behave runner puts the 'features' directory on sys.path,
+so the modules are imported as 'helpers.<module>'.
+"""
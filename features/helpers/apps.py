@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Application handles created on first access.
+
+Every behave invocation used to create handles of all applications of the
+suite in before_all, although a run of a single tag mostly needs the terminal
+only. The registry gives a proxy for every application, the handle is created
+by the sandbox when the proxy is used for the first time, e.g. by a step
+working "in gedit". Applications never used are never resolved.
+"""
+
+from qecore.logger import Logging
+
+log = Logging().logger
+
+
+class LazyApplication:
+    """
+    Proxy of a qecore application handle, created on the first attribute access.
+    """
+
+    def __init__(self, registry, name) -> None:
+        """
+        :param registry: Registry creating the handle.
+        :type registry: <helpers.apps.ApplicationRegistry>
+
+        :param name: Name of the application in the registry.
+        :type name: str
+        """
+
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attribute):
+        return getattr(self._registry.resolve(self._name), attribute)
+
+    def __setattr__(self, attribute, value) -> None:
+        setattr(self._registry.resolve(self._name), attribute, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyApplication '{self._name}'>"
+
+
+class ApplicationRegistry:
+    """
+    Applications of the suite, resolved by the sandbox on demand.
+    """
+
+    def __init__(self, sandbox) -> None:
+        """
+        :param sandbox: Sandbox creating the handles.
+        :type sandbox: <qecore.sandbox.TestSandbox>
+        """
+
+        self.sandbox = sandbox
+        self.arguments = {}
+        self.handles = {}
+
+    def register(self, name, **kwargs) -> LazyApplication:
+        """
+        Register an application without creating its handle.
+
+        :param name: Name of the application in the registry.
+        :type name: str
+
+        :param kwargs: Arguments of TestSandbox.get_application.
+        :type kwargs: dict
+
+        :return: Proxy of the handle.
+        :rtype: <helpers.apps.LazyApplication>
+        """
+
+        self.arguments[name] = kwargs
+        return LazyApplication(self, name)
+
+    def resolve(self, name):
+        """
+        Handle of the application, created by the sandbox on the first call.
+
+        :param name: Name of the application in the registry.
+        :type name: str
+
+        :rtype: <qecore.application.Application>
+        """
+
+        if name not in self.handles:
+            log.debug(f"Resolving application '{name}'.")
+            self.handles[name] = self.sandbox.get_application(**self.arguments[name])
+
+        return self.handles[name]
+
+    def a11y_app_names(self) -> list:
+        """
+        Accessibility names of all registered applications, resolved or not.
+
+        :rtype: list
+        """
+
+        return [
+            kwargs.get("a11y_app_name", kwargs["name"])
+            for kwargs in self.arguments.values()
+        ]
+
+    def summary(self) -> str:
+        """
+        Applications resolved in the whole run.
+
+        :rtype: str
+        """
+
+        unused = [x for x in self.arguments if x not in self.handles]
+        return " ".join(
+            (
+                f"Applications: {len(self.handles)} resolved,",
+                f"never used: {', '.join(unused) or 'none'}.",
+            )
+        )
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Collection of benchmark measurements and comparison against a baseline.
+
+Every metric is a list of samples summarized by median and percentiles.
+Results of the run are written to a JSON file; a metric is a regression when
+its median is worse than the baseline median by more than the tolerance.
+"""
+
+import json
+import os
+import statistics
+from qecore.logger import Logging
+
+log = Logging().logger
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Data of the metric that belongs to the run only, not to the baseline.
+RUN_ONLY_KEYS = ("samples", "curve")
+
+
+def percentile(samples, percent) -> float:
+    """
+    Nearest rank percentile.
+
+    :param samples: Measured values.
+    :type samples: list
+
+    :param percent: Percentile 0-100.
+    :type percent: float
+
+    :rtype: float
+    """
+
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples) -> dict:
+    """
+    Summary statistics of the samples.
+
+    :param samples: Measured values.
+    :type samples: list
+
+    :rtype: dict
+    """
+
+    summary = {
+        "count": len(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "mean": statistics.mean(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+    summary.update({f"p{x}": percentile(samples, x) for x in PERCENTILES})
+
+    return summary
+
+
+class BenchmarkRecorder:
+    """
+    Metrics of the run with the baseline they are compared against.
+    """
+
+    def __init__(self, output_file, baseline_file, tolerance, update=False) -> None:
+        """
+        :param output_file: Path to write the results of the run to.
+        :type output_file: str
+
+        :param baseline_file: Path to the baseline results, may not exist.
+        :type baseline_file: str
+
+        :param tolerance: Allowed relative worsening of a median, e.g. 0.2.
+        :type tolerance: float
+
+        :param update: Write results of the run as the new baseline,
+            defaults to False.
+        :type update: bool, optional
+        """
+
+        self.output_file = output_file
+        self.baseline_file = baseline_file
+        self.tolerance = tolerance
+        self.update = update
+        self.metrics = {}
+        self.baseline = {}
+
+        if baseline_file and os.path.isfile(baseline_file):
+            with open(baseline_file, "r", encoding="utf-8") as baseline:
+                self.baseline = json.load(baseline)
+
+    def record(self, name, samples, unit, higher_is_better=True, **details) -> dict:
+        """
+        Record samples of a metric.
+
+        :param name: Unique name of the metric, e.g. 'throughput/plain/10000/lines'.
+        :type name: str
+
+        :param samples: Measured values.
+        :type samples: list
+
+        :param unit: Unit of the values, e.g. 'lines/s'.
+        :type unit: str
+
+        :param higher_is_better: Direction of improvement, defaults to True.
+        :type higher_is_better: bool, optional
+
+        :param details: Other data stored with the metric.
+        :type details: any
+
+        :return: Recorded metric.
+        :rtype: dict
+        """
+
+        metric = {
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+            "samples": list(samples),
+            **summarize(samples),
+            **details,
+        }
+        self.metrics[name] = metric
+        log.info(f"Benchmark {name}: median {metric['median']:.6g} {unit}")
+
+        return metric
+
+    def regression(self, name) -> str:
+        """
+        Compare median of the metric with the baseline.
+
+        :param name: Name of a recorded metric.
+        :type name: str
+
+        :return: Description of the regression or empty string.
+        :rtype: str
+        """
+
+        metric = self.metrics[name]
+        baseline = self.baseline.get(name)
+        if self.update or not baseline:
+            return ""
+
+        if metric["higher_is_better"]:
+            limit = baseline["median"] * (1 - self.tolerance)
+            regressed = metric["median"] < limit
+        else:
+            limit = baseline["median"] * (1 + self.tolerance)
+            regressed = metric["median"] > limit
+
+        if not regressed:
+            return ""
+
+        return " ".join(
+            (
+                f"Regression of '{name}':",
+                f"median {metric['median']:.6g} {metric['unit']},",
+                f"baseline {baseline['median']:.6g}, limit {limit:.6g}",
+                f"(tolerance {self.tolerance:.0%}).",
+            )
+        )
+
+    def table(self, names=None) -> str:
+        """
+        Text table of recorded metrics.
+
+        :param names: Names of the metrics, defaults to all.
+        :type names: iterable, optional
+
+        :rtype: str
+        """
+
+        lines = []
+        for name in names if names is not None else self.metrics:
+            metric = self.metrics[name]
+            baseline = self.baseline.get(name, {}).get("median")
+            lines.append(
+                " ".join(
+                    (
+                        f"{name}: n={metric['count']}",
+                        f"median={metric['median']:.6g}",
+                        f"p95={metric['p95']:.6g}",
+                        f"p99={metric['p99']:.6g}",
+                        f"{metric['unit']}",
+                        f"(baseline {baseline:.6g})" if baseline else "",
+                    )
+                ).strip()
+            )
+
+        return "\n".join(lines)
+
+    def save(self) -> None:
+        """
+        Write results of the run, and the new baseline in update mode.
+        """
+
+        if not self.metrics:
+            return
+
+        if self.output_file:
+            with open(self.output_file, "w", encoding="utf-8") as output:
+                json.dump(self.metrics, output, indent=2, sort_keys=True)
+
+        if self.update and self.baseline_file:
+            baseline = dict(self.baseline)
+            baseline.update(
+                {
+                    name: {
+                        key: value
+                        for key, value in metric.items()
+                        if key not in RUN_ONLY_KEYS
+                    }
+                    for name, metric in self.metrics.items()
+                }
+            )
+            with open(self.baseline_file, "w", encoding="utf-8") as output:
+                json.dump(baseline, output, indent=2, sort_keys=True)
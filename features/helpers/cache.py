@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Cache of accessible nodes that are looked up over and over in one scenario.
+
+Recursive search from the application root is a D-Bus round trip per node.
+A cached node is reused until the listener reports a window or tab change
+or a focus change, and is revalidated by a single property read before use.
+"""
+
+from qecore.logger import Logging
+
+log = Logging().logger
+
+
+class NodeCache:
+    """
+    Accessible nodes of one application keyed by (role, name, scope).
+    """
+
+    def __init__(self, application_name, listener) -> None:
+        """
+        :param application_name: Name of the application in accessibility tree.
+        :type application_name: str
+
+        :param listener: Listener providing the invalidation events.
+        :type listener: <helpers.listener.AccessibilityListener>
+        """
+
+        self.application_name = application_name
+        self.listener = listener
+        self.hits = 0
+        self.misses = 0
+        self._nodes = {}
+
+    def _generation(self) -> tuple:
+        return (self.listener.structure_generation, self.listener.focus_generation)
+
+    def clear(self) -> None:
+        """
+        Drop all cached nodes.
+        """
+
+        self._nodes.clear()
+
+    def get(self, role_name, name, scope, lookup, validate):
+        """
+        Get cached node or look it up.
+
+        :param role_name: Role name of the node.
+        :type role_name: str
+
+        :param name: Name of the node.
+        :type name: str
+
+        :param scope: Where the node lives, e.g. 'focused' or 'tab:<name>'.
+        :type scope: str
+
+        :param lookup: Callable searching the tree for the node.
+        :type lookup: callable
+
+        :param validate: Callable taking the cached node, returns True if still usable.
+            Should cost a single property read.
+        :type validate: callable
+
+        :return: Accessible node.
+        :rtype: <dogtail.tree.Node>
+        """
+
+        key = (self.application_name, role_name, name, scope)
+        entry = self._nodes.get(key)
+
+        if entry is not None and entry[0] == self._generation():
+            try:
+                if validate(entry[1]):
+                    self.hits += 1
+                    return entry[1]
+            except Exception:  # pylint: disable=broad-except
+                # Node of a closed window or of an application that is gone.
+                pass
+
+        self.misses += 1
+        generation = self._generation()
+        node = lookup()
+        self._nodes[key] = (generation, node)
+        log.debug(f"Node cache miss for '{key}', hits/misses {self.hits}/{self.misses}")
+
+        return node
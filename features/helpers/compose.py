@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Steps run from other steps without context.execute_steps.
+
+Every context.execute_steps call parses the Gherkin text, matches it against
+the whole step registry and runs the new step objects. The composer does the
+parsing and matching once per step text and keeps the step with its matched
+function and converted arguments, a nested step then costs a function call.
+
+Nested steps get the before_step and after_step hooks like the steps run by
+context.execute_steps, so they are timed and reported as sub-steps.
+
+Sequences of steps used by several steps are registered as macros:
+
+    macro("change profile menu", '* Left click "Terminal" "menu" in "terminal"', ...)
+    context.composer.run_macro(context, "change profile menu")
+"""
+
+from behave.model_core import Status  # pylint: disable=import-error
+from behave.parser import parse_steps  # pylint: disable=import-error
+from behave.step_registry import registry  # pylint: disable=import-error
+
+# Named sequences of step texts, formatted with the arguments of run_macro().
+MACROS = {}
+
+
+def macro(name, *steps) -> None:
+    """
+    Register a sequence of steps under a name.
+
+    :param name: Name of the macro.
+    :type name: str
+
+    :param steps: Step texts, e.g. '* Left click "{item}" "menu item" in "terminal"',
+        placeholders are filled by the arguments of run_macro().
+    :type steps: str
+    """
+
+    assert name not in MACROS, f"Macro '{name}' is already registered."
+    MACROS[name] = steps
+
+
+class StepComposer:
+    """
+    Runner of nested steps, parsed and matched once per step text.
+    """
+
+    def __init__(self, before_step=None, after_step=None) -> None:
+        """
+        :param before_step: Hook called before every nested step.
+        :type before_step: callable, optional
+
+        :param after_step: Hook called after every nested step.
+        :type after_step: callable, optional
+        """
+
+        self.before_step = before_step
+        self.after_step = after_step
+        self.compiled = {}
+        self.calls = 0
+
+    def compile(self, text) -> tuple:
+        """
+        Parse and match the step text, cached for the whole run.
+
+        :param text: Step text, e.g. '* Press key: "Enter"'.
+        :type text: str
+
+        :return: Step and its match.
+        :rtype: tuple
+        """
+
+        if text not in self.compiled:
+            steps = parse_steps(text)
+            assert len(steps) == 1, f"Expected one step in '{text}'."
+
+            match = registry.find_match(steps[0])
+            assert match is not None, f"Undefined step '{text}'."
+
+            self.compiled[text] = (steps[0], match)
+
+        return self.compiled[text]
+
+    def run(self, context, *texts) -> None:
+        """
+        Run the steps in order, the first failure stops the rest.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :param texts: Step texts.
+        :type texts: str
+        """
+
+        for text in texts:
+            self._run_step(context, *self.compile(text))
+
+    def run_macro(self, context, name, **arguments) -> None:
+        """
+        Run the steps registered under the name.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :param name: Name of the macro.
+        :type name: str
+
+        :param arguments: Values of the placeholders in the step texts.
+        :type arguments: str
+        """
+
+        assert name in MACROS, f"Macro '{name}' is not registered."
+        self.run(context, *(x.format(**arguments) for x in MACROS[name]))
+
+    def _run_step(self, context, step, match) -> None:
+        self.calls += 1
+
+        # Nested steps do not see the table and text of the step running them.
+        original = (context.table, context.text)
+        context.table, context.text = step.table, step.text
+
+        if self.before_step:
+            self.before_step(context, step)
+
+        step.status = Status.executing
+        try:
+            match.run(context)
+            step.status = Status.passed
+        except Exception as error:
+            step.status = Status.failed
+            raise AssertionError(
+                f"Sub-step failed: {step.keyword} {step.name}\n{error}"
+            ) from error
+        finally:
+            context.table, context.text = original
+            if self.after_step:
+                self.after_step(context, step)
+
+    def summary(self) -> str:
+        """
+        Nested steps run in the whole run.
+
+        :rtype: str
+        """
+
+        return " ".join(
+            (
+                f"Composed steps: {self.calls} run,",
+                f"{len(self.compiled)} parsed and matched.",
+            )
+        )
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+In-process reader of the Terminal settings stored in dconf.
+
+Values are read through GSettings as typed GVariants, there is no subprocess
+per read. Waiting for a value blocks in the GLib main context until the key
+change notification arrives, instead of polling.
+"""
+
+import ast
+from qecore.logger import Logging
+from qecore.utility import run
+
+from helpers.wait import (  # pylint: disable=import-error
+    wait_until,
+    wait_for_dconf_value,
+)
+
+log = Logging().logger
+
+PROFILES_LIST_SCHEMA = "org.gnome.Terminal.ProfilesList"
+PROFILE_SCHEMA = "org.gnome.Terminal.Legacy.Profile"
+PROFILES_PATH = "/org/gnome/terminal/legacy/profiles:/"
+# Built-in profile listed by the schema defaults while the profiles list is unset.
+DEFAULT_PROFILE_UUID = "b1dcc9dd-5262-4d8d-a863-c897e6d979b9"
+
+
+def read_value(path, schema, key, default):
+    """
+    Read the key by the dconf command, the schema default is used when unset.
+
+    :param path: Full dconf key path.
+    :type path: str
+
+    :param schema: Schema of the key, with the path for relocatable schemas.
+    :type schema: str
+
+    :param key: Key name in the schema.
+    :type key: str
+
+    :param default: Value used when neither dconf nor gsettings give one.
+    :type default: any
+
+    :return: Value parsed from the GVariant text format.
+    :rtype: any
+    """
+
+    for command in (f"dconf read {path}", f"gsettings get {schema} {key}"):
+        text = run(command).strip()
+        if not text:
+            continue
+
+        try:
+            return ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            continue
+
+    return default
+
+
+def profile_key_from_dconf(key) -> str:
+    """
+    Get dconf path of the key of the only profile written to dconf.
+
+    :param key: Profile key.
+    :type key: str
+
+    :return: Full dconf key path.
+    :rtype: str
+    """
+
+    profile_id = run(f"dconf list {PROFILES_PATH}").strip("\n")
+    return f"{PROFILES_PATH}{profile_id}{key}"
+
+
+class DconfReader:
+    """
+    Typed reader of the default Terminal profile.
+
+    The profile UUID is resolved once per scenario, see :meth:`reset`.
+    """
+
+    def __init__(self) -> None:
+        self.available = False
+        self._profile_uuid = None
+        self._profile = None
+        self._profiles_list = None
+        self._changes = 0
+
+        try:
+            # Import here so that the session bus is touched only once session is up.
+            from gi.repository import Gio  # pylint: disable=import-outside-toplevel
+
+            source = Gio.SettingsSchemaSource.get_default()
+            self.available = all(
+                source is not None and source.lookup(schema, True) is not None
+                for schema in (PROFILES_LIST_SCHEMA, PROFILE_SCHEMA)
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            log.info(f"GSettings not available, using dconf command: {error}")
+
+    def reset(self) -> None:
+        """
+        Forget the resolved profile, used between scenarios.
+        """
+
+        self._profile_uuid = None
+        self._profile = None
+
+    @property
+    def profile_uuid(self) -> str:
+        """
+        UUID of the default profile.
+
+        :rtype: str
+        """
+
+        if self._profile_uuid is None:
+            from gi.repository import Gio  # pylint: disable=import-outside-toplevel
+
+            profiles_list = Gio.Settings.new(PROFILES_LIST_SCHEMA)
+            self._profile_uuid = profiles_list.get_string("default")
+
+        return self._profile_uuid
+
+    def _profile_settings(self):
+        if self._profile is None:
+            from gi.repository import Gio  # pylint: disable=import-outside-toplevel
+
+            self._profile = Gio.Settings.new_with_path(
+                PROFILE_SCHEMA, f"{PROFILES_PATH}:{self.profile_uuid}/"
+            )
+            self._profile.connect("changed", self._on_changed)
+
+        return self._profile
+
+    def _profiles_list_settings(self):
+        if self._profiles_list is None:
+            from gi.repository import Gio  # pylint: disable=import-outside-toplevel
+
+            self._profiles_list = Gio.Settings.new(PROFILES_LIST_SCHEMA)
+            self._profiles_list.connect("changed", self._on_changed)
+
+        return self._profiles_list
+
+    def _on_changed(self, settings, key) -> None:  # pylint: disable=unused-argument
+        self._changes += 1
+
+    def _dispatch(self, seconds=0) -> None:
+        """
+        Deliver pending change notifications, block up to seconds for a new one.
+
+        :param seconds: Maximal time to spend waiting, defaults to 0.
+        :type seconds: float, optional
+        """
+
+        from gi.repository import GLib  # pylint: disable=import-outside-toplevel
+
+        main_context = GLib.MainContext.default()
+        while main_context.pending():
+            main_context.iteration(False)
+
+        if seconds <= 0:
+            return
+
+        expired = []
+
+        def expire() -> bool:
+            expired.append(True)
+            return False
+
+        source_id = GLib.timeout_add(max(1, int(seconds * 1000)), expire)
+        changes = self._changes
+
+        while not expired and changes == self._changes:
+            main_context.iteration(True)
+
+        if not expired:
+            GLib.source_remove(source_id)
+
+    def read(self, key):
+        """
+        Current value of the default profile key.
+
+        :param key: Profile key, e.g. 'scrollback-lines'.
+        :type key: str
+
+        :rtype: <GLib.Variant>
+        """
+
+        self._dispatch()
+        return self._profile_settings().get_value(key)
+
+    def parse(self, key, text):
+        """
+        Parse text as a value of the key type.
+
+        Strings may be given without quotes, as they are written in the scenarios.
+
+        :param key: Profile key.
+        :type key: str
+
+        :param text: Value in GVariant text format.
+        :type text: str
+
+        :rtype: <GLib.Variant>
+        """
+
+        from gi.repository import GLib  # pylint: disable=import-outside-toplevel
+
+        value_type = self.read(key).get_type()
+        try:
+            return GLib.Variant.parse(value_type, text, None, None)
+        except GLib.Error:
+            if value_type.equal(GLib.VariantType.new("s")):
+                return GLib.Variant("s", text)
+            raise
+
+    def wait_for_value(self, key, expected_text, negation=False, **kwargs):
+        """
+        Wait until the default profile key is (or is not) equal to expected value.
+
+        Accepts the same keyword arguments as :func:`helpers.wait.wait_until`.
+
+        :param key: Profile key.
+        :type key: str
+
+        :param expected_text: Expected value in GVariant text format.
+        :type expected_text: str
+
+        :param negation: Wait for the value to differ, defaults to False.
+        :type negation: bool, optional
+
+        :return: Stored value in GVariant text format.
+        :rtype: str
+        """
+
+        message = kwargs.pop("message", "Value stored in dconf did not match.")
+
+        if not self.available:
+            # Without the schemas only the textual value is at hand.
+            return wait_for_dconf_value(
+                lambda: profile_key_from_dconf(key),
+                lambda stored: (expected_text in stored) != negation,
+                message=message,
+                **kwargs,
+            )
+
+        expected = self.parse(key, expected_text)
+        last = [None]
+
+        def stored() -> str:
+            return None if last[0] is None else last[0].print_(False)
+
+        def check():
+            last[0] = self.read(key)
+            if last[0].equal(expected) == negation:
+                return None
+            return (last[0].print_(False),)
+
+        return wait_until(
+            check,
+            message=lambda: "\n".join(
+                (
+                    message,
+                    f"Key:          '{key}' of profile '{self.profile_uuid}'",
+                    f"Expected:     '{expected.print_(False)}'",
+                    f"Stored value: '{stored()}'",
+                )
+            ),
+            idle=self._dispatch,
+            **kwargs,
+        )[0]
+
+    def profiles(self) -> dict:
+        """
+        Profiles in the order of the profiles list.
+
+        :return: Profile UUIDs mapped to visible names.
+        :rtype: dict
+        """
+
+        if not self.available:
+            uuids = read_value(
+                f"{PROFILES_PATH}list",
+                PROFILES_LIST_SCHEMA,
+                "list",
+                [DEFAULT_PROFILE_UUID],
+            )
+            return {
+                uuid: read_value(
+                    f"{PROFILES_PATH}:{uuid}/visible-name",
+                    f"{PROFILE_SCHEMA}:{PROFILES_PATH}:{uuid}/",
+                    "visible-name",
+                    "",
+                )
+                for uuid in uuids
+            }
+
+        from gi.repository import Gio  # pylint: disable=import-outside-toplevel
+
+        self._dispatch()
+        return {
+            uuid: Gio.Settings.new_with_path(
+                PROFILE_SCHEMA, f"{PROFILES_PATH}:{uuid}/"
+            ).get_string("visible-name")
+            for uuid in self._profiles_list_settings().get_strv("list")
+        }
+
+    def default_profile(self) -> str:
+        """
+        UUID of the default profile as currently stored, not cached.
+
+        :rtype: str
+        """
+
+        if not self.available:
+            return read_value(
+                f"{PROFILES_PATH}default",
+                PROFILES_LIST_SCHEMA,
+                "default",
+                DEFAULT_PROFILE_UUID,
+            )
+
+        self._dispatch()
+        return self._profiles_list_settings().get_string("default")
+
+    def wait_for_profiles(self, predicate, **kwargs) -> dict:
+        """
+        Wait until the profiles satisfy the predicate.
+
+        Accepts the same keyword arguments as :func:`helpers.wait.wait_until`.
+
+        :param predicate: Callable taking the result of :meth:`profiles`.
+        :type predicate: callable
+
+        :return: Profile UUIDs mapped to visible names.
+        :rtype: dict
+        """
+
+        def check():
+            profiles = self.profiles()
+            return predicate(profiles) and (profiles,)
+
+        if self.available:
+            kwargs.setdefault("idle", self._dispatch)
+
+        return wait_until(check, **kwargs)[0]
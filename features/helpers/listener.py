@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Event driven tracking of the accessibility tree of tested applications.
+
+Instead of walking the whole tree every second, the listener subscribes to AT-SPI
+events of registered applications. Waiting steps sleep in the GLib main context and
+wake up only when a relevant event arrives, values derived from tree searches
+are recomputed only after the tree structure changed.
+"""
+
+from time import monotonic, perf_counter, sleep
+from qecore.logger import Logging
+
+from helpers.wait import wait_until  # pylint: disable=import-error
+
+log = Logging().logger
+
+STRUCTURE_EVENTS = (
+    "object:children-changed",
+    "window:create",
+    "window:destroy",
+)
+
+STATE_EVENTS = (
+    "object:state-changed:showing",
+    "object:state-changed:selected",
+    "object:state-changed:sensitive",
+    "object:state-changed:focused",
+)
+
+# Safety net for missed events, derived values are refreshed at least this often.
+FALLBACK_INTERVAL = 1
+
+
+class AccessibilityListener:
+    """
+    Listener of AT-SPI events keeping live state of registered applications.
+    """
+
+    def __init__(self, application_names) -> None:
+        """
+        :param application_names: Names of the applications in accessibility tree.
+        :type application_names: iterable
+        """
+
+        self.application_names = set(application_names)
+        self.structure_generation = 0
+        self.state_generation = 0
+        self.focus_generation = 0
+        self.event_generation = 0
+        self.states = {}
+        self._subscribers = []
+        self._derived = {}
+        self._listener = None
+
+    @property
+    def active(self) -> bool:
+        """
+        Listener is subscribed to the events.
+
+        :rtype: bool
+        """
+
+        return self._listener is not None
+
+    def start(self) -> None:
+        """
+        Subscribe to the events. When AT-SPI is not available, waiting falls back
+        to plain polling.
+        """
+
+        if self.active:
+            return
+
+        try:
+            # Import here so that accessibility is touched only once session is up.
+            from gi.repository import Atspi  # pylint: disable=import-outside-toplevel
+
+            self._listener = Atspi.EventListener.new(self._on_event)
+            for event_type in STRUCTURE_EVENTS + STATE_EVENTS:
+                self._listener.register(event_type)
+        except Exception as error:  # pylint: disable=broad-except
+            log.info(f"AT-SPI listener not available, polling instead: {error}")
+            self._listener = None
+
+    def stop(self) -> None:
+        """
+        Unsubscribe from the events.
+        """
+
+        if not self.active:
+            return
+
+        for event_type in STRUCTURE_EVENTS + STATE_EVENTS:
+            try:
+                self._listener.deregister(event_type)
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+        self._listener = None
+
+    def subscribe(self, event_type, callback) -> tuple:
+        """
+        Deliver events of additional type of registered applications to callback.
+
+        Waiting of :meth:`pump` wakes up on every delivered event.
+
+        :param event_type: AT-SPI event type, e.g. 'object:text-changed:insert'.
+        :type event_type: str
+
+        :param callback: Callable taking the event and the time it was received.
+        :type callback: callable
+
+        :return: Subscription to be passed to :meth:`unsubscribe`.
+        :rtype: tuple
+        """
+
+        subscription = (event_type, callback)
+        self._subscribers.append(subscription)
+        if self.active and event_type not in STRUCTURE_EVENTS + STATE_EVENTS:
+            self._listener.register(event_type)
+
+        return subscription
+
+    def unsubscribe(self, subscription) -> None:
+        """
+        Stop delivering events to the callback.
+
+        :param subscription: Value returned by :meth:`subscribe`.
+        :type subscription: tuple
+        """
+
+        self._subscribers.remove(subscription)
+        event_type = subscription[0]
+        if event_type in STRUCTURE_EVENTS + STATE_EVENTS:
+            return
+
+        if self.active and all(x[0] != event_type for x in self._subscribers):
+            try:
+                self._listener.deregister(event_type)
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+    def reset(self) -> None:
+        """
+        Forget everything learned from the events, used between scenarios.
+        """
+
+        self.states.clear()
+        self._derived.clear()
+        self.structure_generation += 1
+        self.state_generation += 1
+        self.focus_generation += 1
+
+    def _on_event(self, event) -> None:
+        """
+        Callback of AT-SPI events.
+
+        :param event: AT-SPI event.
+        :type event: <Atspi.Event>
+        """
+
+        received = perf_counter()
+
+        try:
+            application_name = event.source.get_application().get_name()
+        except Exception:  # pylint: disable=broad-except
+            return
+
+        if application_name not in self.application_names:
+            return
+
+        if self._subscribers:
+            for event_type, callback in self._subscribers:
+                if event.type.startswith(event_type):
+                    self.event_generation += 1
+                    callback(event, received)
+
+        if event.type.startswith("object:state-changed:"):
+            state = event.type.rsplit(":", 1)[-1]
+            self.states[(event.source, state)] = bool(event.detail1)
+            self.state_generation += 1
+            if state == "focused":
+                self.focus_generation += 1
+        elif event.type.startswith(STRUCTURE_EVENTS):
+            self.structure_generation += 1
+
+    def _generation(self) -> int:
+        return self.structure_generation + self.state_generation + self.event_generation
+
+    def pump(self, seconds) -> None:
+        """
+        Process pending events, block until a relevant event arrives or time is up.
+
+        Used as the idle callable of :func:`helpers.wait.wait_until`.
+
+        :param seconds: Maximal time to spend waiting.
+        :type seconds: float
+        """
+
+        if not self.active:
+            sleep(seconds)
+            return
+
+        from gi.repository import GLib  # pylint: disable=import-outside-toplevel
+
+        main_context = GLib.MainContext.default()
+        expired = []
+
+        def expire() -> bool:
+            expired.append(True)
+            return False
+
+        source_id = GLib.timeout_add(max(1, int(seconds * 1000)), expire)
+        generation = self._generation()
+
+        while not expired and generation == self._generation():
+            main_context.iteration(True)
+
+        if not expired:
+            GLib.source_remove(source_id)
+
+    def drain(self) -> None:
+        """
+        Process all pending events without blocking.
+
+        Unlike :meth:`pump`, does not stop at the first relevant event, so that
+        everything queued so far is handled before a cache is trusted.
+        """
+
+        if not self.active:
+            return
+
+        from gi.repository import GLib  # pylint: disable=import-outside-toplevel
+
+        main_context = GLib.MainContext.default()
+        while main_context.pending():
+            main_context.iteration(False)
+
+    def wait_for(self, predicate, **kwargs):
+        """
+        Wait until predicate holds, re-checking it only when an event arrived.
+
+        Accepts the same keyword arguments as :func:`helpers.wait.wait_until`.
+
+        :param predicate: Callable without arguments.
+        :type predicate: callable
+
+        :return: The first truthy value returned by predicate.
+        :rtype: any
+        """
+
+        kwargs.setdefault("interval", FALLBACK_INTERVAL)
+        kwargs.setdefault("max_interval", FALLBACK_INTERVAL)
+        kwargs.setdefault("backoff", 1)
+
+        return wait_until(predicate, idle=self.pump, **kwargs)
+
+    def state_of(self, node, state) -> bool:
+        """
+        Current state of the node, taken from the last event when there was one.
+
+        :param node: Accessible node.
+        :type node: <dogtail.tree.Node>
+
+        :param state: Tracked state name, e.g. 'sensitive'.
+        :type state: str
+
+        :rtype: bool
+        """
+
+        try:
+            return self.states[(node, state)]
+        except (KeyError, TypeError):
+            return bool(getattr(node, state))
+
+    def wait_for_state(self, node, state, expected=True, **kwargs):
+        """
+        Wait until the node gets to the expected state.
+
+        :param node: Accessible node.
+        :type node: <dogtail.tree.Node>
+
+        :param state: Tracked state name, e.g. 'sensitive'.
+        :type state: str
+
+        :param expected: Expected state, defaults to True.
+        :type expected: bool, optional
+
+        :return: The node.
+        :rtype: <dogtail.tree.Node>
+        """
+
+        kwargs.setdefault(
+            "message", f"Node '{node.name}' '{node.roleName}' {state} != '{expected}'."
+        )
+
+        self.wait_for(lambda: self.state_of(node, state) == expected, **kwargs)
+        return node
+
+    def derived(self, key, compute):
+        """
+        Value computed from the tree, recomputed only after the structure changed.
+
+        :param key: Identification of the value.
+        :type key: hashable
+
+        :param compute: Callable doing the tree search.
+        :type compute: callable
+
+        :return: Current value.
+        :rtype: any
+        """
+
+        cached = self._derived.get(key)
+        now = monotonic()
+        if (
+            cached is None
+            or cached[0] != self.structure_generation
+            or now - cached[1] >= FALLBACK_INTERVAL
+        ):
+            cached = (self.structure_generation, now, compute())
+            self._derived[key] = cached
+
+        return cached[2]
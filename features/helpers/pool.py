@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Warm mode of an application: one server process reused across scenarios.
+
+Instead of killing the server after every scenario and starting it cold again,
+the first start of a scenario opens a fresh window in the running server and
+closes everything opened before, by ending the shells of the old tabs.
+Settings of the profile are reset by the dconf restore between scenarios.
+When the reused server does not end up in the expected state, it is restarted
+the usual way.
+"""
+
+import shlex
+from subprocess import Popen, DEVNULL
+from time import perf_counter
+from qecore.logger import Logging
+from qecore.utility import run
+
+from helpers.procstat import application_pid  # pylint: disable=import-error
+from helpers.wait import wait_until  # pylint: disable=import-error
+
+log = Logging().logger
+
+
+class WarmApplication:
+    """
+    Warm mode of a qecore application handle.
+    """
+
+    def __init__(self, application, server_process_name) -> None:
+        """
+        :param application: Application handle from the sandbox.
+        :type application: <qecore.application.Application>
+
+        :param server_process_name: Name of the process kept alive.
+        :type server_process_name: str
+        """
+
+        self.application = application
+        self.server_process_name = server_process_name
+        self.started_in_scenario = False
+        self.warm_starts = 0
+        self.cold_starts = 0
+        self.seconds = 0.0
+        self._start_via_command = application.start_via_command
+
+    def install(self) -> None:
+        """
+        Keep the server alive after scenarios and take over the starts via command.
+        """
+
+        self.application.kill = False
+        self.application.start_via_command = self.start_via_command
+
+    def before_scenario(self) -> None:
+        """
+        Mark the next start as the first one of the scenario.
+        """
+
+        self.started_in_scenario = False
+
+    def server_pid(self):
+        """
+        Process ID of the running server of this session.
+
+        Taken from the accessible application, a server of another session,
+        e.g. of a parallel shard, is never touched.
+
+        :return: Process ID or None.
+        :rtype: int
+        """
+
+        return application_pid(self.application)
+
+    def start_via_command(self, command=None, **kwargs) -> None:
+        """
+        Replacement of :meth:`qecore.application.Application.start_via_command`.
+
+        Only the first start of a scenario without in session start is warm,
+        any other start is passed to the original method.
+
+        :param command: Complete command that is to be used to start application.
+        :type command: str
+        """
+
+        start = perf_counter()
+        warm = not self.started_in_scenario and not any(
+            value for key, value in kwargs.items() if "session" in str(key).lower()
+        )
+        self.started_in_scenario = True
+
+        if warm and self.application.is_running() and self.server_pid():
+            try:
+                self._warm_start(command)
+                self.warm_starts += 1
+                self.seconds += perf_counter() - start
+                return
+            except Exception as error:  # pylint: disable=broad-except
+                # Timeouts as well as GLib and AT-SPI errors of a dying server.
+                log.info(
+                    " ".join(
+                        (
+                            "Warm start failed, restarting the application:",
+                            f"{type(error).__name__}: {error}",
+                        )
+                    )
+                )
+
+        # Cold start has to kill the server regardless of the warm mode.
+        self.application.kill = True
+        try:
+            self._start_via_command(command=command, **kwargs)
+        finally:
+            self.application.kill = False
+
+        self.cold_starts += 1
+        self.seconds += perf_counter() - start
+
+    def _warm_start(self, command) -> None:
+        """
+        Open a fresh window in the running server and close all the old ones.
+
+        :param command: Complete command that is to be used to start application.
+        :type command: str
+
+        :raises WaitTimeout: When the server did not end up with one fresh window.
+        """
+
+        server_pid = self.server_pid()
+        old_shells = run(f"pgrep -P {server_pid}").split()
+
+        Popen(  # pylint: disable=consider-using-with
+            shlex.split(command if command else self.application.exec),
+            stdout=DEVNULL,
+            stderr=DEVNULL,
+        )
+        wait_until(
+            lambda: len(run(f"pgrep -P {server_pid}").split()) > len(old_shells),
+            message="New window was not opened in the running server.",
+        )
+
+        if old_shells:
+            # Tabs close once their shell ended, windows close with their last tab.
+            run(f"kill -KILL {' '.join(old_shells)}")
+
+        self.application.instance = self.application.get_root()
+        wait_until(
+            lambda: self.window_count() == 1 and self.tab_count() == 1,
+            timeout=5,
+            message=lambda: " ".join(
+                (
+                    "Reused server did not end up with one window and one tab.",
+                    f"Windows: '{self.window_count()}', tabs: '{self.tab_count()}'.",
+                )
+            ),
+        )
+
+    def window_count(self) -> int:
+        """
+        :return: Number of application windows.
+        :rtype: int
+        """
+
+        return len(
+            self.application.instance.findChildren(lambda x: x.roleName == "frame")
+        )
+
+    def tab_count(self) -> int:
+        """
+        :return: Number of terminal widgets in all windows.
+        :rtype: int
+        """
+
+        return len(
+            self.application.instance.findChildren(lambda x: x.roleName == "terminal")
+        )
+
+    def summary(self) -> str:
+        """
+        Starts done in the whole run.
+
+        :rtype: str
+        """
+
+        return " ".join(
+            (
+                f"Warm mode: {self.warm_starts} warm",
+                f"and {self.cold_starts} cold starts",
+                f"in {self.seconds:.2f} seconds.",
+            )
+        )
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Preferences session kept open across consecutive steps.
+
+Steps working with the profiles open the preferences through the session and
+release them instead of closing. Released preferences stay open while the
+following steps work in preferences too, they are closed before the first
+step that needs the terminal window.
+"""
+
+from behave.step_registry import registry  # pylint: disable=import-error
+from qecore.logger import Logging
+
+from helpers.compose import macro  # pylint: disable=import-error
+from helpers.selector import Selector, shared_index  # pylint: disable=import-error
+from helpers.wait import wait_until  # pylint: disable=import-error
+
+log = Logging().logger
+
+# Steps working in preferences, see uses_preferences().
+PREFERENCES_STEPS = set()
+
+# Steps not touching any window, they keep released preferences open.
+NEUTRAL_STEPS = (" in dconf", " before action")
+
+macro(
+    "open preferences",
+    '* Left click "Edit" "menu" in "terminal"',
+    '* Left click "Preferences" "menu item" in "terminal"',
+    '* Application "preferences" is running',
+)
+
+
+def uses_preferences(function):
+    """
+    Mark the step function as working in the preferences window.
+
+    :param function: Step function.
+    :type function: callable
+
+    :return: The same function.
+    :rtype: callable
+    """
+
+    PREFERENCES_STEPS.add(function)
+    return function
+
+
+def preferences_window_is_showing(context) -> bool:
+    """
+    Check if the Preferences window is showing.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :return: Preferences window is showing.
+    :rtype: bool
+    """
+
+    if not context.preferences.is_running():
+        return False
+
+    context.preferences.instance = context.preferences.get_root()
+    return bool(
+        context.preferences.instance.findChildren(
+            lambda x: "Preferences" in x.name and x.roleName == "frame" and x.showing
+        )
+    )
+
+
+class PreferencesSession:
+    """
+    Lazily opened and lazily closed preferences window.
+    """
+
+    def __init__(self) -> None:
+        self.released = False
+        self.opens = 0
+        self.reuses = 0
+        self.closes = 0
+
+    def before_scenario(self) -> None:
+        """
+        Applications are started again in every scenario.
+        """
+
+        self.released = False
+
+    def open(self, context, reuse=True) -> None:
+        """
+        Open preferences, released preferences that are still showing are reused.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :param reuse: Reuse released preferences, otherwise preferences that
+            are showing are closed and opened again, defaults to True.
+        :type reuse: bool, optional
+        """
+
+        if self.released and preferences_window_is_showing(context):
+            if reuse:
+                self.released = False
+                self.reuses += 1
+                return
+
+            self.close(context)
+
+        self.released = False
+        context.composer.run_macro(context, "open preferences")
+        wait_until(
+            lambda: preferences_window_is_showing(context),
+            message="Preferences window is not showing.",
+        )
+        self.opens += 1
+
+    def release(self) -> None:
+        """
+        The step is done with preferences, close them once a step needs the terminal.
+        """
+
+        self.released = True
+
+    def close(self, context) -> None:
+        """
+        Close preferences and wait until they are gone.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+        """
+
+        self.released = False
+
+        index = shared_index(
+            context.listener, context.preferences.instance, ("frame", "push button")
+        )
+        target_frame = wait_until(
+            lambda: index.find(Selector("frame", name_contains="Preferences")),
+            message="Frame 'Preferences' was not found.",
+        )
+
+        close_buttons = wait_until(
+            lambda: shared_index(
+                context.listener, target_frame, ("push button",)
+            ).find_all(Selector("push button", name="Close", showing=True)),
+            message="Button 'Close' was not found in preferences.",
+        )
+        close_buttons[-1].click()
+
+        wait_until(
+            lambda: not preferences_window_is_showing(context),
+            message="Preferences window is still showing.",
+        )
+        self.closes += 1
+
+    def before_step(self, context, step) -> None:
+        """
+        Close released preferences before a step that does not work in them.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :param step: Step that is about to run.
+        :type step: <behave.model.Step>
+        """
+
+        if not self.released:
+            return
+
+        if 'in "preferences"' in step.name or step.name.endswith(NEUTRAL_STEPS):
+            return
+
+        match = registry.find_match(step)
+        if match is not None and match.func in PREFERENCES_STEPS:
+            return
+
+        log.debug(f"Closing preferences before step '{step.name}'.")
+        if preferences_window_is_showing(context):
+            self.close(context)
+        else:
+            self.released = False
+
+    def summary(self) -> str:
+        """
+        Preferences opened in the whole run.
+
+        :rtype: str
+        """
+
+        return " ".join(
+            (
+                f"Preferences: {self.opens} opened, {self.reuses} reused,",
+                f"{self.closes} closed.",
+            )
+        )
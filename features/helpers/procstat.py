@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Resource usage of processes read from /proc.
+
+Resources of the tested applications are sampled in a thread during every
+scenario. The values at the end of the scenarios make a trend of the whole run;
+steady growth within one process is reported as a possible leak.
+"""
+
+import os
+import threading
+from time import perf_counter
+from qecore.logger import Logging
+
+log = Logging().logger
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# Sampled values of the trend, see usage().
+TREND_KEYS = ("rss", "fds", "threads")
+# Number of the last scenarios of one process checked for growth.
+LEAK_WINDOW = 10
+
+SPARK = "▁▂▃▄▅▆▇█"
+
+
+def application_pid(application):
+    """
+    Process ID of the application, taken from its accessible root.
+
+    Unlike matching the executable name in /proc, it does not find processes
+    of other sessions, e.g. of parallel shards or of the desktop itself.
+
+    :param application: Application handle.
+    :type application: <qecore.application.Application>
+
+    :return: Process ID or None when the application is not running.
+    :rtype: int
+    """
+
+    try:
+        if not application.is_running():
+            return None
+
+        return application.get_root().get_process_id() or None
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def memory(pid) -> dict:
+    """
+    Memory of the process in kB.
+
+    Proportional set size is only in smaps_rollup, the status file is used
+    when it is not available.
+
+    :param pid: Process ID.
+    :type pid: int
+
+    :return: Resident and proportional set size, PSS may be None.
+    :rtype: dict
+    """
+
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as smaps:
+            fields = dict(
+                line.split(":", 1)
+                for line in smaps
+                if line[:1].isupper() and ":" in line
+            )
+        return {
+            "rss": int(fields["Rss"].split()[0]),
+            "pss": int(fields["Pss"].split()[0]),
+        }
+    except (OSError, KeyError):
+        pass
+
+    with open(f"/proc/{pid}/status", "r", encoding="utf-8") as status:
+        fields = dict(line.split(":", 1) for line in status if ":" in line)
+
+    return {"rss": int(fields["VmRSS"].split()[0]), "pss": None}
+
+
+def usage(pid) -> dict:
+    """
+    CPU time, memory, open file descriptors and threads of the process.
+
+    :param pid: Process ID.
+    :type pid: int
+
+    :return: CPU seconds, RSS and PSS in kB, number of fds and threads.
+    :rtype: dict
+    """
+
+    with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as stat:
+        # Name of the process may contain spaces, fields start after it.
+        fields = stat.read().rsplit(")", 1)[1].split()
+
+    return {
+        "cpu": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "threads": int(fields[17]),
+        "fds": len(os.listdir(f"/proc/{pid}/fd")),
+        **memory(pid),
+    }
+
+
+def sparkline(values) -> str:
+    """
+    One character per value scaled between the minimum and maximum.
+
+    :param values: Numbers.
+    :type values: list
+
+    :rtype: str
+    """
+
+    low, high = min(values), max(values)
+    scale = (high - low) / (len(SPARK) - 1) or 1
+    return "".join(SPARK[int((x - low) / scale)] for x in values)
+
+
+def scrollback_files(pid) -> dict:
+    """
+    Temporary files of VTE scrollback held open by the process.
+
+    The files are unlinked right after creation, they are only reachable
+    through the file descriptors.
+
+    :param pid: Process ID.
+    :type pid: int
+
+    :return: Number of the files and their total size in kB.
+    :rtype: dict
+    """
+
+    files = 0
+    size = 0
+    for descriptor in os.listdir(f"/proc/{pid}/fd"):
+        path = f"/proc/{pid}/fd/{descriptor}"
+        try:
+            if not os.path.basename(os.readlink(path)).startswith("vte"):
+                continue
+            size += os.stat(path).st_size
+        except OSError:
+            continue
+        files += 1
+
+    return {"scrollback_files": files, "scrollback_kb": size // 1024}
+
+
+class ProcessSampler(threading.Thread):
+    """
+    Thread calling the sample function at a fixed interval.
+    """
+
+    def __init__(self, sample, interval) -> None:
+        """
+        :param sample: Callable returning a dict of measured values.
+        :type sample: callable
+
+        :param interval: Seconds between the samples.
+        :type interval: float
+        """
+
+        super().__init__(daemon=True)
+        self.sample = sample
+        self.interval = interval
+        self.samples = []
+        self.error = None
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        start = perf_counter()
+        while True:
+            try:
+                self.samples.append(
+                    {"seconds": perf_counter() - start, **self.sample()}
+                )
+            except OSError as error:
+                # Process ended, e.g. killed by the scenario.
+                self.error = error
+
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self) -> list:
+        """
+        Stop the sampling.
+
+        :return: Samples with seconds since the start.
+        :rtype: list
+        """
+
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+        return self.samples
+
+
+class ResourceMonitor:
+    """
+    Resources of the application processes sampled during every scenario.
+
+    Process IDs are resolved through AT-SPI, which is not used from the sampling
+    thread, :meth:`update_pids` is called from the step hooks instead.
+    """
+
+    def __init__(self, applications, interval) -> None:
+        """
+        :param applications: Process names mapped to the application handles,
+            e.g. 'gnome-terminal-server': context.terminal.
+        :type applications: dict
+
+        :param interval: Seconds between the samples, 0 disables the sampling.
+        :type interval: float
+        """
+
+        self.applications = dict(applications)
+        self.names = tuple(self.applications)
+        self.pids = {}
+        self.interval = interval
+        self.trend = {name: [] for name in self.names}
+        self.leaks = []
+        self._flagged = set()
+        self._sampler = None
+
+    def _sample(self) -> dict:
+        sample = {}
+        for name, pid in list(self.pids.items()):
+            if pid is None:
+                continue
+
+            try:
+                sample[name] = {"pid": pid, **usage(pid)}
+            except OSError:
+                # Process ended in between.
+                continue
+
+        return sample
+
+    def update_pids(self) -> None:
+        """
+        Resolve process IDs of applications not known yet or no longer running.
+        """
+
+        if not self._sampler:
+            return
+
+        for name, application in self.applications.items():
+            pid = self.pids.get(name)
+            if pid is None or not os.path.exists(f"/proc/{pid}"):
+                self.pids[name] = application_pid(application)
+
+    def start_scenario(self) -> None:
+        """
+        Start sampling in a thread.
+        """
+
+        if self.interval <= 0:
+            return
+
+        self.pids = {}
+        self._sampler = ProcessSampler(self._sample, self.interval)
+        self._sampler.start()
+
+    def stop_scenario(self, scenario) -> str:
+        """
+        Stop sampling, add the last values to the trend and check it for leaks.
+
+        Has to be called before the applications are closed.
+
+        :param scenario: Name of the scenario.
+        :type scenario: str
+
+        :return: Table of the scenario samples, empty when nothing was sampled.
+        :rtype: str
+        """
+
+        if not self._sampler:
+            return ""
+
+        samples = self._sampler.stop()
+        self._sampler = None
+
+        lines = []
+        for name in self.names:
+            values = [(x["seconds"], x[name]) for x in samples if name in x]
+            if not values:
+                continue
+
+            last = values[-1][1]
+            self.trend[name].append({"scenario": scenario, **last})
+            self._check_leak(name)
+
+            cpu = last["cpu"] - values[0][1]["cpu"]
+            elapsed = values[-1][0] - values[0][0]
+            lines += [
+                " ".join(
+                    (
+                        f"{name} [{last['pid']}]:",
+                        f"CPU {cpu:.2f}s",
+                        f"({cpu / elapsed:.0%})" if elapsed else "",
+                        f"threads {last['threads']}, fds {last['fds']}",
+                    )
+                ),
+                " ".join(
+                    (
+                        f"  RSS {sparkline([x['rss'] for _, x in values])}",
+                        f"{values[0][1]['rss']} -> {last['rss']} kB",
+                        f"(max {max(x['rss'] for _, x in values)} kB)",
+                    )
+                ),
+            ]
+
+        return "\n".join(lines)
+
+    def _check_leak(self, name) -> None:
+        """
+        Flag values that grew in each of the last scenarios of one process.
+        """
+
+        window = self.trend[name][-LEAK_WINDOW:]
+        if len(window) < LEAK_WINDOW or len({x["pid"] for x in window}) > 1:
+            return
+
+        for key in TREND_KEYS:
+            values = [x[key] for x in window]
+            flag = (name, key, window[-1]["pid"])
+            if flag not in self._flagged and all(
+                x < y for x, y in zip(values, values[1:])
+            ):
+                self._flagged.add(flag)
+                leak = " ".join(
+                    (
+                        f"Possible leak: {key} of {name} [{window[-1]['pid']}]",
+                        f"grew in each of the last {LEAK_WINDOW} scenarios,",
+                        f"{values[0]} -> {values[-1]}.",
+                    )
+                )
+                log.info(leak)
+                self.leaks.append(leak)
+
+    def summary(self) -> str:
+        """
+        Trend of the whole run with the possible leaks.
+
+        :rtype: str
+        """
+
+        lines = ["Resource trend:"]
+        for name, trend in self.trend.items():
+            if not trend:
+                continue
+
+            lines.append(
+                " ".join(
+                    (
+                        f"  {name}: {len(trend)} scenarios,",
+                        *(
+                            f"{key} {sparkline([x[key] for x in trend])}"
+                            for key in TREND_KEYS
+                        ),
+                    )
+                )
+            )
+
+        return "\n".join(lines + self.leaks)
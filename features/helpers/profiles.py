@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Profile fixtures written directly to dconf.
+
+Scenarios that only need profiles to exist get them without the preferences
+dialog. All profiles of one step are written in a single transaction: the
+profiles list and the keys of every profile under its UUID. The step then waits
+until the new profiles list is visible through GSettings. A running
+gnome-terminal-server picks the change up asynchronously, steps seeding
+profiles for it wait until its Change Profile menu lists them, see
+:func:`wait_for_server`.
+"""
+
+import uuid as uuid_module
+from qecore.logger import Logging
+
+from helpers.dconf import PROFILES_PATH  # pylint: disable=import-error
+from helpers.selector import Selector, shared_index  # pylint: disable=import-error
+
+log = Logging().logger
+
+
+def variant_string(text) -> str:
+    """
+    String in GVariant text format.
+
+    :param text: Any string.
+    :type text: str
+
+    :rtype: str
+    """
+
+    escaped = text.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def variant_string_list(texts) -> str:
+    """
+    List of strings in GVariant text format.
+
+    :param texts: Strings.
+    :type texts: iterable
+
+    :rtype: str
+    """
+
+    return f"[{', '.join(variant_string(x) for x in texts)}]"
+
+
+def wait_for_server(context, names) -> None:
+    """
+    Wait until running gnome-terminal-server lists the profiles in its
+    Change Profile menu. Server started later reads the profiles on its own.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param names: Visible names of the profiles.
+    :type names: iterable
+    """
+
+    if not context.terminal.is_running():
+        return
+
+    names = list(names)
+
+    def missing() -> list:
+        index = shared_index(
+            context.listener, context.terminal.instance, ("radio menu item",)
+        )
+        return [x for x in names if not index.find(Selector("radio menu item", name=x))]
+
+    context.listener.wait_for(
+        lambda: not missing(),
+        timeout=10,
+        message=lambda: f"Profiles {missing()} are not in the Change Profile menu.",
+    )
+
+
+class ProfileFixtures:
+    """
+    Create, rename, delete and seed Terminal profiles in dconf.
+    """
+
+    def __init__(self, state, reader) -> None:
+        """
+        :param state: Dconf state the writes go through, restored after scenario.
+        :type state: <helpers.state.DconfState>
+
+        :param reader: Reader of the profiles list.
+        :type reader: <helpers.dconf.DconfReader>
+        """
+
+        self.state = state
+        self.reader = reader
+
+    def uuid_of(self, name) -> str:
+        """
+        UUID of the profile.
+
+        :param name: Visible name of the profile.
+        :type name: str
+
+        :rtype: str
+        """
+
+        uuids = [x for x, visible in self.reader.profiles().items() if visible == name]
+        assert uuids, f"Profile '{name}' does not exist."
+
+        return uuids[0]
+
+    def _value(self, key, text) -> str:
+        if not self.reader.available:
+            return text
+
+        return self.reader.parse(key, text).print_(False)
+
+    def _commit(self, changes, predicate, message) -> dict:
+        self.state.write(changes)
+        log.debug(f"Profile fixture wrote {len(changes)} dconf keys.")
+
+        return self.reader.wait_for_profiles(predicate, message=message)
+
+    def seed(self, profiles) -> dict:
+        """
+        Create the profiles with their settings, existing ones are only updated.
+
+        :param profiles: Profile names mapped to dicts of keys and values in
+            GVariant text format, strings may be without quotes.
+        :type profiles: dict
+
+        :return: Profile names mapped to UUIDs.
+        :rtype: dict
+        """
+
+        existing = {name: uuid for uuid, name in self.reader.profiles().items()}
+        uuids = list(existing.values())
+        seeded = {}
+        changes = {}
+
+        for name, settings in profiles.items():
+            uuid = existing.get(name)
+            if uuid is None:
+                uuid = str(uuid_module.uuid4())
+                uuids.append(uuid)
+                changes[f"{PROFILES_PATH}:{uuid}/visible-name"] = variant_string(name)
+
+            changes.update(
+                {
+                    f"{PROFILES_PATH}:{uuid}/{key}": self._value(key, value)
+                    for key, value in settings.items()
+                }
+            )
+            seeded[name] = uuid
+
+        changes[f"{PROFILES_PATH}list"] = variant_string_list(uuids)
+
+        self._commit(
+            changes,
+            lambda current: all(current.get(x) == name for name, x in seeded.items()),
+            f"Profiles {list(profiles)} were not seeded.",
+        )
+
+        return seeded
+
+    def rename(self, name, new_name) -> None:
+        """
+        Rename the profile.
+
+        :param name: Visible name of the profile.
+        :type name: str
+
+        :param new_name: New visible name.
+        :type new_name: str
+        """
+
+        uuid = self.uuid_of(name)
+        self._commit(
+            {f"{PROFILES_PATH}:{uuid}/visible-name": variant_string(new_name)},
+            lambda current: current.get(uuid) == new_name,
+            f"Profile '{name}' was not renamed to '{new_name}'.",
+        )
+
+    def delete(self, name) -> None:
+        """
+        Delete the profile, the first remaining one becomes default if needed.
+
+        :param name: Visible name of the profile.
+        :type name: str
+        """
+
+        uuid = self.uuid_of(name)
+        remaining = [x for x in self.reader.profiles() if x != uuid]
+        assert remaining, f"Profile '{name}' is the last one."
+
+        changes = {
+            f"{PROFILES_PATH}:{uuid}/": None,
+            f"{PROFILES_PATH}list": variant_string_list(remaining),
+        }
+        if self.reader.default_profile() == uuid:
+            changes[f"{PROFILES_PATH}default"] = variant_string(remaining[0])
+
+        self._commit(
+            changes,
+            lambda current: uuid not in current,
+            f"Profile '{name}' was not deleted.",
+        )
+
+    def set_default(self, name) -> None:
+        """
+        Make the profile default.
+
+        :param name: Visible name of the profile.
+        :type name: str
+        """
+
+        uuid = self.uuid_of(name)
+        self.state.write({f"{PROFILES_PATH}default": variant_string(uuid)})
+        self.reader.wait_for_profiles(
+            lambda _: self.reader.default_profile() == uuid,
+            message=f"Profile '{name}' was not set as default.",
+        )
+        # Profile option steps resolve the default profile again.
+        self.reader.reset()
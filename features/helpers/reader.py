@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Incremental reading of the terminal text.
+
+The whole text of a terminal with a long scrollback is megabytes over D-Bus.
+The reader keeps the text of every terminal it read and fetches only the range
+from the lowest offset reported by a text-changed event, or from the previous
+end of the text, to the current end. Searches continue from where the previous
+search of the same string stopped.
+
+Every change of the terminal text is an event delivered to the test process,
+so the events are subscribed only while the text is being waited for, see
+:meth:`TerminalText.watching`. Changes made while unsubscribed are found by
+comparing a window of the cached text before its end: when it still matches,
+only the end of the cached text and the new text are read again. Output is
+appended to the terminal, so the window does not match only after the screen
+was cleared or the scrollback dropped lines, then the whole text is read.
+"""
+
+import re
+from contextlib import contextmanager
+
+TEXT_EVENTS = "object:text-changed"
+
+# Characters at the end of the cached text that are always read again, e.g. the
+# prompt line edited in place, and the size of the compared window before them.
+REREAD_CHARACTERS = 256
+VERIFY_CHARACTERS = 256
+
+
+class TerminalText:
+    """
+    Cached text of terminal widgets, invalidated by text-changed events.
+    """
+
+    def __init__(self, listener) -> None:
+        """
+        :param listener: Listener delivering the text-changed events.
+        :type listener: <helpers.listener.AccessibilityListener>
+        """
+
+        self.listener = listener
+        self.characters_read = 0
+        self._texts = {}
+        self._searches = {}
+        self._subscription = None
+        self._watchers = 0
+
+    @contextmanager
+    def watching(self):
+        """
+        Keep the text-changed events subscribed, reads within follow the events.
+
+        Cached texts are verified once after the subscription changed, changes
+        made while unsubscribed were not reported.
+        """
+
+        if not self._watchers and self.listener.active:
+            self._subscription = self.listener.subscribe(TEXT_EVENTS, self._on_changed)
+            self._unverify()
+        self._watchers += 1
+        try:
+            yield self
+        finally:
+            self._watchers -= 1
+            if not self._watchers:
+                if self._subscription:
+                    self.listener.unsubscribe(self._subscription)
+                    self._subscription = None
+                self._unverify()
+
+    def _unverify(self) -> None:
+        for entry in self._texts.values():
+            entry["verified"] = False
+
+    def wait_for(self, predicate, **kwargs):
+        """
+        Wait on the listener until predicate reading the text holds.
+
+        Accepts the same keyword arguments as :func:`helpers.wait.wait_until`.
+
+        :param predicate: Callable without arguments.
+        :type predicate: callable
+
+        :return: The first truthy value returned by predicate.
+        :rtype: any
+        """
+
+        with self.watching():
+            return self.listener.wait_for(predicate, **kwargs)
+
+    def reset(self) -> None:
+        """
+        Forget all texts, used between scenarios.
+        """
+
+        self._texts.clear()
+        self._searches.clear()
+
+    def _verified_start(self, text, cached, count) -> int:
+        """
+        Offset the cached text is still valid up to, checked by a window before
+        its end, 0 when the text changed elsewhere than at its end.
+        """
+
+        check = max(0, len(cached) - REREAD_CHARACTERS)
+        anchor = max(0, check - VERIFY_CHARACTERS)
+        if count < check or text.getText(anchor, check) != cached[anchor:check]:
+            return 0
+
+        return check
+
+    def _on_changed(self, event, received) -> None:  # pylint: disable=unused-argument
+        entry = self._texts.get(event.source)
+        if entry is not None:
+            entry["changed"] = min(entry["changed"], max(0, event.detail1))
+
+    def read(self, terminal) -> str:
+        """
+        Current text of the terminal, only the changed range is transferred.
+
+        Within :meth:`watching` the changed range is given by the events,
+        otherwise by comparing the cached text, see the module description.
+
+        :param terminal: Accessible node of the terminal.
+        :type terminal: <dogtail.tree.Node>
+
+        :rtype: str
+        """
+
+        # Deliver events of all changes made since the last read.
+        self.listener.drain()
+
+        text = terminal.queryText()
+        count = text.characterCount
+        entry = self._texts.get(terminal)
+
+        if entry is None:
+            cached = ""
+            start = 0
+        elif self._subscription and entry["verified"]:
+            cached = entry["text"]
+            start = min(entry["changed"], len(cached), count)
+        else:
+            cached = entry["text"]
+            start = self._verified_start(text, cached, count)
+
+        update = text.getText(start, count)
+        self.characters_read += len(update)
+        self._texts[terminal] = {
+            "text": cached[:start] + update,
+            "changed": count,
+            "verified": bool(self._subscription),
+        }
+
+        # Matches in the changed range are not valid anymore.
+        for search in self._searches.get(terminal, {}).values():
+            if search["found"] and search["found"][1] > start:
+                search["found"] = None
+            search["searched"] = min(search["searched"], start)
+
+        return self._texts[terminal]["text"]
+
+    def search(self, terminal, pattern, regex=False):
+        """
+        Search the terminal text, continuing from the previous search.
+
+        Only the text changed since the previous search of the same pattern is
+        searched again. Regular expressions are expected to match within a line.
+
+        :param terminal: Accessible node of the terminal.
+        :type terminal: <dogtail.tree.Node>
+
+        :param pattern: String or regular expression to search for.
+        :type pattern: str
+
+        :param regex: The pattern is a regular expression, defaults to False.
+        :type regex: bool, optional
+
+        :return: Offsets of the first match or None.
+        :rtype: tuple
+        """
+
+        text = self.read(terminal)
+        search = self._searches.setdefault(terminal, {}).setdefault(
+            (pattern, regex), {"found": None, "searched": 0}
+        )
+        if search["found"]:
+            return search["found"]
+
+        if regex:
+            start = text.rfind("\n", 0, search["searched"]) + 1
+            match = re.compile(pattern, re.MULTILINE).search(text, start)
+            found = match.span() if match else None
+        else:
+            start = max(0, search["searched"] - len(pattern) + 1)
+            index = text.find(pattern, start)
+            found = (index, index + len(pattern)) if index >= 0 else None
+
+        search["found"] = found
+        search["searched"] = len(text)
+
+        return found
+
+    def contains(self, terminal, pattern, regex=False) -> bool:
+        """
+        Check that the terminal text contains the string or a regex match.
+
+        :param terminal: Accessible node of the terminal.
+        :type terminal: <dogtail.tree.Node>
+
+        :param pattern: String or regular expression to search for.
+        :type pattern: str
+
+        :param regex: The pattern is a regular expression, defaults to False.
+        :type regex: bool, optional
+
+        :rtype: bool
+        """
+
+        return self.search(terminal, pattern, regex) is not None
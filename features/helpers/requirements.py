@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Initial state of a scenario declared by tags.
+
+Tags '@require.<name>' on a feature or a scenario are applied before the
+application starts, through settings and the start command instead of driving
+the UI:
+
+    @require.menubar                  menubar shown in new windows
+    @require.shortcuts                keyboard shortcuts enabled
+    @require.maximized                window started maximized
+    @require.default_profile.<name>   profile created and set as default
+
+Once the application is started, the state is verified by one indexed query
+of the accessibility tree, see :meth:`Requirements.verify`.
+"""
+
+from qecore.logger import Logging
+
+from helpers.selector import Selector, RoleIndex  # pylint: disable=import-error
+
+log = Logging().logger
+
+REQUIRE_TAG = "require."
+SETTINGS_PATH = "/org/gnome/terminal/legacy/"
+
+DCONF_REQUIREMENTS = {
+    "menubar": {f"{SETTINGS_PATH}default-show-menubar": "true"},
+    "shortcuts": {f"{SETTINGS_PATH}shortcuts-enabled": "true"},
+}
+COMMAND_REQUIREMENTS = {"maximized": "--maximize"}
+VALUE_REQUIREMENTS = ("default_profile",)
+
+WINDOW_NOT_SHOWING = "Terminal window is not showing."
+
+
+def parse_requirements(tags) -> dict:
+    """
+    Requirements declared by the tags.
+
+    :param tags: Effective tags of the scenario.
+    :type tags: iterable
+
+    :return: Names of the requirements mapped to their values, True if without one.
+    :rtype: dict
+    """
+
+    required = {}
+    for tag in tags:
+        if not tag.startswith(REQUIRE_TAG):
+            continue
+
+        name, _, value = tag[len(REQUIRE_TAG) :].partition(".")
+        if name in VALUE_REQUIREMENTS and value:
+            required[name] = value
+        elif name in DCONF_REQUIREMENTS or name in COMMAND_REQUIREMENTS:
+            required[name] = True
+        else:
+            log.info(f"Unknown requirement tag '@{tag}' is ignored.")
+
+    return required
+
+
+class Requirements:
+    """
+    Requirements of the current scenario on the terminal application.
+    """
+
+    def __init__(self, application) -> None:
+        """
+        :param application: Application handle of the terminal.
+        :type application: <qecore.application.Application>
+        """
+
+        self.application = application
+        self.command = application.exec
+        self.required = {}
+
+    def apply(self, context, tags) -> None:
+        """
+        Apply the requirements before the application is started.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :param tags: Effective tags of the scenario.
+        :type tags: iterable
+        """
+
+        self.required = parse_requirements(tags)
+
+        changes = {}
+        for name, keys in DCONF_REQUIREMENTS.items():
+            if name in self.required:
+                changes.update(keys)
+        if changes:
+            context.dconf_state.write(changes)
+
+        self.application.exec = " ".join(
+            (
+                self.command,
+                *(
+                    option
+                    for name, option in COMMAND_REQUIREMENTS.items()
+                    if name in self.required
+                ),
+            )
+        )
+
+        if "default_profile" in self.required:
+            profile = self.required["default_profile"]
+            context.profiles.seed({profile: {}})
+            context.profiles.set_default(profile)
+
+    def restore(self) -> None:
+        """
+        Return the start command of the application to the original one.
+        """
+
+        self.application.exec = self.command
+
+    def unmet(self, context) -> list:
+        """
+        Requirements that do not hold, checked by one indexed tree query.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :return: Descriptions of unmet requirements.
+        :rtype: list
+        """
+
+        index = RoleIndex(context.terminal.instance, ("frame", "terminal", "menu bar"))
+        frames = index.find_all(Selector("frame", showing=True))
+        if not frames:
+            return [WINDOW_NOT_SHOWING]
+
+        unmet = []
+        if not index.find(Selector("terminal", focused=True)):
+            unmet.append("Terminal is not focused.")
+
+        if "menubar" in self.required and not index.find(
+            Selector("menu bar", showing=True, visible=True)
+        ):
+            unmet.append("Menubar is not showing.")
+
+        if (
+            "maximized" in self.required
+            and frames[0].size[0] != tuple(context.sandbox.resolution)[0]
+        ):
+            unmet.append(f"Window of size {frames[0].size} is not maximized.")
+
+        return unmet
+
+    def verify(self, context) -> None:
+        """
+        Wait until the started application meets the requirements.
+
+        Terminal window is clicked once on wayland to get the focus.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+        """
+
+        unmet = []
+
+        def window_is_showing() -> bool:
+            unmet[:] = self.unmet(context)
+            return WINDOW_NOT_SHOWING not in unmet
+
+        def met() -> bool:
+            unmet[:] = self.unmet(context)
+            return not unmet
+
+        def message() -> str:
+            return "\n".join(("Required state is not met:", *unmet))
+
+        context.listener.wait_for(window_is_showing, timeout=10, message=message)
+
+        if unmet and context.sandbox.session_type == "wayland":
+            context.terminal.instance.children[0].click()
+
+        context.listener.wait_for(met, timeout=10, message=message)
+
+        if "default_profile" in self.required:
+            profile = self.required["default_profile"]
+            assert context.dconf.default_profile() == context.profiles.uuid_of(
+                profile
+            ), f"Profile '{profile}' is not default."
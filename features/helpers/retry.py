@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Retry of failed scenarios within the running behave process.
+
+Only the failed scenario is run again, with its own before and after scenario
+hooks, so that every attempt is a separate entry in the html-pretty report.
+The number of retries in the whole run is limited, so that a broken machine does
+not multiply the run time.
+"""
+
+import functools
+import os
+from behave.model import ScenarioOutline  # pylint: disable=import-error
+from qecore.logger import Logging
+
+log = Logging().logger
+
+
+class RetryBudget:
+    """
+    Limit of retries shared by all scenarios of the run.
+    """
+
+    def __init__(self, max_attempts, max_retries) -> None:
+        """
+        :param max_attempts: Maximal number of attempts of a single scenario.
+        :type max_attempts: int
+
+        :param max_retries: Maximal number of retries in the whole run.
+        :type max_retries: int
+        """
+
+        self.max_attempts = max_attempts
+        self.max_retries = max_retries
+        self.retries = 0
+        self.recovered = []
+
+    def enabled_for(self, scenario) -> bool:
+        """
+        Check if the scenario is to be retried by this budget.
+
+        Scenarios retried by qecore, via AUTORETRY or STABILITY variables
+        or autoretry and stability tags, are left alone.
+
+        :param scenario: Scenario or Scenario Outline.
+        :type scenario: <behave.model.Scenario>
+
+        :rtype: bool
+        """
+
+        if self.max_attempts < 2:
+            return False
+
+        if os.environ.get("AUTORETRY", "").isdigit():
+            return False
+
+        if os.environ.get("STABILITY", "").isdigit():
+            return False
+
+        return not any(
+            "autoretry" in tag or "stability" in tag for tag in scenario.effective_tags
+        )
+
+    def patch(self, scenario) -> None:
+        """
+        Make the scenario run again after failure while the budget lasts.
+
+        :param scenario: Scenario or Scenario Outline.
+        :type scenario: <behave.model.Scenario>
+        """
+
+        scenarios = (
+            scenario.scenarios if isinstance(scenario, ScenarioOutline) else [scenario]
+        )
+
+        for single_scenario in scenarios:
+            single_scenario.run = functools.partial(
+                self._run_with_retries, single_scenario, single_scenario.run
+            )
+
+    def _run_with_retries(self, scenario, scenario_run, *args, **kwargs) -> bool:
+        """
+        Replacement of scenario run.
+
+        :return: The scenario failed.
+        :rtype: bool
+        """
+
+        for attempt in range(1, self.max_attempts + 1):
+            failed = scenario_run(*args, **kwargs)
+
+            if not failed:
+                if attempt > 1:
+                    self.recovered.append(scenario.name)
+                    log.info(f"Scenario '{scenario.name}' passed on attempt {attempt}.")
+                return False
+
+            if attempt == self.max_attempts or self.retries >= self.max_retries:
+                break
+
+            self.retries += 1
+            log.info(f"Scenario '{scenario.name}' failed on attempt {attempt}, retry.")
+
+        return True
+
+    def summary(self) -> str:
+        """
+        Retries done in the whole run.
+
+        :rtype: str
+        """
+
+        return " ".join(
+            (
+                f"Scenario retry: {self.retries} of {self.max_retries} retries used,",
+                f"recovered scenarios: {self.recovered}.",
+            )
+        )
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Declarative selectors answered from a one-shot role index of a subtree.
+
+A lambda passed to findChild/findChildren is evaluated on every node of the
+subtree, every property it touches is a D-Bus call. The index fetches the nodes
+of the wanted roles in a single AT-SPI Collection GetMatches call, so only
+the nodes with a matching role are inspected further.
+"""
+
+from time import perf_counter
+from qecore.logger import Logging
+
+log = Logging().logger
+
+
+class Selector:
+    """
+    Node description: role, name and required states.
+    """
+
+    def __init__(self, role_name, name=None, name_contains=None, **states) -> None:
+        """
+        :param role_name: Role name of the node, e.g. 'push button'.
+        :type role_name: str
+
+        :param name: Exact name of the node, defaults to None.
+        :type name: str, optional
+
+        :param name_contains: Part of the name of the node, defaults to None.
+        :type name_contains: str, optional
+
+        :param states: Required states, e.g. showing=True, sensitive=True.
+        :type states: bool
+        """
+
+        self.role_name = role_name
+        self.name = name
+        self.name_contains = name_contains
+        self.states = states
+
+    def __repr__(self) -> str:
+        parts = [repr(self.role_name)]
+        if self.name is not None:
+            parts.append(f"name={self.name!r}")
+        if self.name_contains is not None:
+            parts.append(f"name_contains={self.name_contains!r}")
+        parts.extend(f"{state}={value}" for state, value in self.states.items())
+        return f"Selector({', '.join(parts)})"
+
+    def matches(self, node) -> bool:
+        """
+        Check the node against the selector.
+
+        Usable as a findChild/findChildren predicate as well.
+
+        :param node: Accessible node.
+        :type node: <dogtail.tree.Node>
+
+        :rtype: bool
+        """
+
+        if node.roleName != self.role_name:
+            return False
+
+        if self.name is not None and node.name != self.name:
+            return False
+
+        if self.name_contains is not None and self.name_contains not in node.name:
+            return False
+
+        return all(
+            bool(getattr(node, state)) == value for state, value in self.states.items()
+        )
+
+
+class RoleIndex:
+    """
+    Nodes of a subtree grouped by role name, built by one batched traversal.
+    """
+
+    # Set from environment.py, compares every query with the plain findChildren.
+    measure = False
+
+    def __init__(self, root, role_names) -> None:
+        """
+        :param root: Accessible node the subtree starts at, the scope of queries.
+        :type root: <dogtail.tree.Node>
+
+        :param role_names: Role names to index.
+        :type role_names: iterable
+        """
+
+        self.root = root
+        self.role_names = tuple(role_names)
+        self.nodes = {role_name: [] for role_name in self.role_names}
+
+        start = perf_counter()
+        self.batched = self._collect_batched()
+        if not self.batched:
+            self._collect_traversal()
+        self.build_time = perf_counter() - start
+
+        log.debug(
+            " ".join(
+                (
+                    f"RoleIndex of {self.role_names}:",
+                    f"{sum(len(x) for x in self.nodes.values())} nodes",
+                    f"in {self.build_time * 1000:.1f} ms",
+                    "via Collection" if self.batched else "via traversal",
+                )
+            )
+        )
+
+    def _collect_batched(self) -> bool:
+        """
+        Fetch the nodes with the AT-SPI Collection interface in one call.
+
+        :return: Collection was available and used.
+        :rtype: bool
+        """
+
+        try:
+            # Import here so that accessibility is touched only once session is up.
+            from gi.repository import Atspi  # pylint: disable=import-outside-toplevel
+
+            collection = self.root.get_collection_iface()
+            if collection is None:
+                return False
+
+            roles = [
+                getattr(Atspi.Role, role_name.upper().replace(" ", "_"))
+                for role_name in self.role_names
+            ]
+            rule = Atspi.MatchRule.new(
+                Atspi.StateSet.new([]),
+                Atspi.CollectionMatchType.ALL,
+                {},
+                Atspi.CollectionMatchType.ALL,
+                roles,
+                Atspi.CollectionMatchType.ANY,
+                [],
+                Atspi.CollectionMatchType.ALL,
+                False,
+            )
+            matches = collection.get_matches(
+                rule, Atspi.CollectionSortOrder.CANONICAL, 0, True
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            log.debug(f"Collection GetMatches not available: {error}")
+            return False
+
+        for node in matches:
+            role_name = node.roleName
+            if role_name in self.nodes:
+                self.nodes[role_name].append(node)
+
+        return True
+
+    def _collect_traversal(self) -> None:
+        """
+        Fetch the nodes by a single traversal, reading only the role of each node.
+        """
+
+        for node in self.root.findChildren(lambda x: x.roleName in self.nodes):
+            self.nodes[node.roleName].append(node)
+
+    def find_all(self, selector) -> list:
+        """
+        All indexed nodes matching the selector, in tree order.
+
+        :param selector: Node description.
+        :type selector: <helpers.selector.Selector>
+
+        :rtype: list
+        """
+
+        assert selector.role_name in self.nodes, "".join(
+            (
+                f"Role '{selector.role_name}' is not indexed, ",
+                f"indexed roles are {self.role_names}.",
+            )
+        )
+
+        start = perf_counter()
+        found = [x for x in self.nodes[selector.role_name] if selector.matches(x)]
+        query_time = perf_counter() - start
+
+        if self.measure:
+            start = perf_counter()
+            self.root.findChildren(selector.matches)
+            legacy_time = perf_counter() - start
+            log.info(
+                " ".join(
+                    (
+                        f"Lookup {selector}: findChildren {legacy_time * 1000:.1f} ms,",
+                        f"index {(self.build_time + query_time) * 1000:.1f} ms",
+                        f"(build {self.build_time * 1000:.1f} ms).",
+                    )
+                )
+            )
+
+        return found
+
+    def find(self, selector):
+        """
+        First indexed node matching the selector.
+
+        :param selector: Node description.
+        :type selector: <helpers.selector.Selector>
+
+        :return: Accessible node or None.
+        :rtype: <dogtail.tree.Node>
+        """
+
+        found = self.find_all(selector)
+        return found[0] if found else None
+
+
+def shared_index(listener, root, role_names) -> RoleIndex:
+    """
+    Role index of the subtree shared by all lookups until its structure changes.
+
+    :param listener: Listener tracking the structure changes.
+    :type listener: <helpers.listener.AccessibilityListener>
+
+    :param root: Accessible node the subtree starts at.
+    :type root: <dogtail.tree.Node>
+
+    :param role_names: Role names to index.
+    :type role_names: iterable
+
+    :rtype: <helpers.selector.RoleIndex>
+    """
+
+    role_names = tuple(role_names)
+    return listener.derived(
+        ("role index", root, role_names), lambda: RoleIndex(root, role_names)
+    )
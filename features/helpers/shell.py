@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Shell integration: prompts and exit statuses reported through a side channel.
+
+Shells started by the terminal inherit PROMPT_COMMAND from the environment of
+the test process. Before every prompt it appends the shell PID and exit status
+of the last command to the status file, so that steps know when a command
+finished without reading the terminal text.
+
+A shell whose startup files replace PROMPT_COMMAND reports nothing, waits then
+fall back to the callable given to them.
+"""
+
+import os
+import tempfile
+from time import perf_counter
+from qecore.logger import Logging
+
+from helpers.wait import wait_until  # pylint: disable=import-error
+
+log = Logging().logger
+
+STATUS_VARIABLE = "GNOME_TERMINAL_TEST_STATUS"
+PROMPT_HOOK = f'printf "%s %s\\n" "$$" "$?" >> "${STATUS_VARIABLE}"'
+
+# Prompt detected by the fallback, shell PID and status are not known.
+UNKNOWN = {"pid": None, "status": None}
+
+
+class ShellIntegration:
+    """
+    Reader of the prompts reported by the shells.
+    """
+
+    def __init__(self, status_file="") -> None:
+        """
+        :param status_file: Path to the file the shells append to, a new file
+            private to this process when empty.
+        :type status_file: str, optional
+        """
+
+        self.created = not status_file
+        if self.created:
+            descriptor, status_file = tempfile.mkstemp(
+                prefix=f"shell_status_{os.getpid()}_"
+            )
+            os.close(descriptor)
+
+        self.status_file = status_file
+        self.records = []
+        self.consumed = 0
+        self.pending = False
+        self.active = False
+        self._position = 0
+
+        with open(status_file, "w", encoding="utf-8"):
+            pass
+
+    def install(self, environment=None) -> None:
+        """
+        Set the prompt hook to the environment inherited by the shells.
+
+        :param environment: Environment to change, defaults to os.environ.
+        :type environment: dict, optional
+        """
+
+        environment = os.environ if environment is None else environment
+        environment[STATUS_VARIABLE] = self.status_file
+        command = environment.get("PROMPT_COMMAND")
+        environment["PROMPT_COMMAND"] = (
+            f"{PROMPT_HOOK}; {command}" if command else PROMPT_HOOK
+        )
+
+    def cleanup(self) -> None:
+        """
+        Remove the status file if it was created by this instance.
+
+        File given in the configuration is left to its owner.
+        """
+
+        if self.created and os.path.exists(self.status_file):
+            os.remove(self.status_file)
+            log.debug(f"Removed shell status file '{self.status_file}'.")
+
+    def _read(self) -> None:
+        with open(self.status_file, "r", encoding="utf-8") as status:
+            status.seek(self._position)
+            data = status.read()
+
+        # Only complete lines, the rest is read next time.
+        complete = data[: data.rfind("\n") + 1]
+        self._position += len(complete.encode())
+        for line in complete.splitlines():
+            pid, status_code = line.split()
+            self.records.append(
+                {"pid": int(pid), "status": int(status_code), "time": perf_counter()}
+            )
+            self.active = True
+
+    def before_scenario(self) -> None:
+        """
+        Forget the prompts of the previous scenario.
+        """
+
+        self._read()
+        self.consumed = len(self.records)
+        self.pending = False
+
+    def mark(self) -> None:
+        """
+        Forget the prompts reported so far, the next wait is for a new one.
+
+        Called when a command is executed, until the wait the command is pending.
+        """
+
+        self._read()
+        self.consumed = len(self.records)
+        self.pending = True
+
+    def _wait(self, find, fallback, timeout) -> dict:
+        def reported():
+            self._read()
+            return find() or (not self.active and fallback() and UNKNOWN)
+
+        record = wait_until(
+            reported,
+            timeout=timeout,
+            interval=0.01,
+            max_interval=0.1,
+            message="Shell did not show a prompt.",
+        )
+        if record is UNKNOWN:
+            log.info("Prompt found in the terminal text, no shell reported it.")
+
+        return record
+
+    def wait_for_prompt(self, fallback, timeout=30) -> dict:
+        """
+        Wait for a prompt reported after the last mark or the last wait,
+        that is for the executed command to finish.
+
+        :param fallback: Callable checking the prompt in the terminal text,
+            used while no shell reported a prompt.
+        :type fallback: callable
+
+        :param timeout: Number of seconds to wait, defaults to 30.
+        :type timeout: float, optional
+
+        :return: Shell PID and the exit status of the last command,
+            both None when detected by the fallback.
+        :rtype: dict
+        """
+
+        record = self._wait(
+            lambda: len(self.records) > self.consumed and self.records[self.consumed],
+            fallback,
+            timeout,
+        )
+        self.pending = False
+        if record is not UNKNOWN:
+            self.consumed += 1
+
+        return record
+
+    def wait_for_new_shell(self, fallback, timeout=30) -> dict:
+        """
+        Wait for the first prompt of a shell that did not report before,
+        e.g. of a newly opened tab or window.
+
+        :param fallback: Callable checking the prompt in the terminal text,
+            used while no shell reported a prompt.
+        :type fallback: callable
+
+        :param timeout: Number of seconds to wait, defaults to 30.
+        :type timeout: float, optional
+
+        :return: Shell PID and status 0, both None when detected by the fallback.
+        :rtype: dict
+        """
+
+        self._read()
+        start = len(self.records)
+        known = {x["pid"] for x in self.records}
+
+        return self._wait(
+            lambda: next(
+                (x for x in self.records[start:] if x["pid"] not in known), None
+            ),
+            fallback,
+            timeout,
+        )
+
+    def last_status(self) -> int:
+        """
+        Exit status of the last finished command.
+
+        :rtype: int
+        """
+
+        assert self.active, " ".join(
+            (
+                "Shell integration is not active,",
+                "no shell reported a prompt. Is PROMPT_COMMAND replaced",
+                "by the shell startup files?",
+            )
+        )
+        assert self.consumed, "No command finished yet."
+
+        return self.records[self.consumed - 1]["status"]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Startup time of a behave invocation.
+
+runtest.sh starts one behave process per test, so the time until the first
+scenario runs is paid by every test. It is split into the time since the
+process started until before_all, which is the interpreter with the imports
+of behave, environment.py and the step modules, and the time of before_all.
+
+With 'profile_startup' enabled, before_all runs under cProfile and the most
+expensive calls are printed. Imports alone are profiled by Python itself:
+
+    python3 -X importtime -m behave -t <tag> 2> importtime.log
+"""
+
+import cProfile
+import io
+import os
+import pstats
+from time import perf_counter
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+PROFILE_ENTRIES = 25
+
+
+def process_age() -> float:
+    """
+    Seconds since the current process started.
+
+    :rtype: float
+    """
+
+    with open("/proc/self/stat", "r", encoding="utf-8") as stat:
+        # The command name may contain spaces, fields are counted after it.
+        fields = stat.read().rsplit(")", 1)[1].split()
+    with open("/proc/uptime", "r", encoding="utf-8") as uptime:
+        system_uptime = float(uptime.read().split()[0])
+
+    return system_uptime - int(fields[19]) / CLOCK_TICKS
+
+
+class StartupProfile:
+    """
+    Time of the imports and of before_all, optionally profiled.
+    """
+
+    def __init__(self, profile=False) -> None:
+        """
+        :param profile: Run before_all under cProfile, defaults to False.
+        :type profile: bool, optional
+        """
+
+        self.imports = process_age()
+        self.before_all = None
+        self._start = perf_counter()
+        self._profiler = None
+
+        if profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        """
+        End of before_all.
+        """
+
+        self.before_all = perf_counter() - self._start
+        if self._profiler:
+            self._profiler.disable()
+
+    def summary(self) -> str:
+        """
+        Startup time and the profile of before_all if enabled.
+
+        :rtype: str
+        """
+
+        lines = [
+            " ".join(
+                (
+                    f"Startup: {self.imports:.2f} s before before_all,",
+                    f"{self.before_all or 0:.2f} s in before_all.",
+                )
+            )
+        ]
+
+        if self._profiler:
+            output = io.StringIO()
+            statistics = pstats.Stats(self._profiler, stream=output)
+            statistics.sort_stats("cumulative").print_stats(PROFILE_ENTRIES)
+            lines.append(output.getvalue())
+
+        return "\n".join(lines)
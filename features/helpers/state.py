@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Restoring of dconf state between scenarios.
+
+The state of the tested dconf directories is snapshotted once per run.
+After a scenario only the keys that differ from the snapshot are written back,
+all of them in one call of the dconf writer service.
+"""
+
+import shlex
+from time import perf_counter
+from qecore.logger import Logging
+from qecore.utility import run
+
+log = Logging().logger
+
+DCONF_BUS_NAME = "ca.desrt.dconf"
+DCONF_WRITER_PATH = "/ca/desrt/dconf/Writer/user"
+DCONF_WRITER_INTERFACE = "ca.desrt.dconf.Writer"
+
+
+def dump(directory) -> dict:
+    """
+    Read all keys under dconf directory.
+
+    :param directory: Dconf directory path ending with '/'.
+    :type directory: str
+
+    :return: Full key paths mapped to values in GVariant text format.
+    :rtype: dict
+    """
+
+    values = {}
+    section = directory
+
+    for line in run(f"dconf dump {directory}").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("[") and line.endswith("]"):
+            relative = line[1:-1].strip("/")
+            section = f"{directory}{relative}/" if relative else directory
+            continue
+
+        key, _, value = line.partition("=")
+        values[f"{section}{key}"] = value
+
+    return values
+
+
+class DconfState:
+    """
+    Snapshot of dconf directories and keys restored by a single batched write.
+    """
+
+    def __init__(self, directories=(), keys=()) -> None:
+        """
+        :param directories: Dconf directories to restore, paths ending with '/'.
+        :type directories: iterable
+
+        :param keys: Single dconf keys to restore.
+        :type keys: iterable
+        """
+
+        self.directories = tuple(directories)
+        self.keys = tuple(keys)
+        self.snapshot = {}
+        self.dirty = True
+        self.was_reset = False
+        self.restores = 0
+        self.skipped = 0
+        self.keys_restored = 0
+        self.seconds = 0.0
+
+    def current(self) -> dict:
+        """
+        Current values of the tracked directories and keys.
+
+        :rtype: dict
+        """
+
+        values = {}
+        for directory in self.directories:
+            values.update(dump(directory))
+
+        for key in self.keys:
+            value = run(f"dconf read {key}").strip("\n")
+            if value:
+                values[key] = value
+
+        return values
+
+    def take_snapshot(self, reset=False) -> None:
+        """
+        Remember the state to return to after every scenario.
+
+        :param reset: Reset tracked directories and keys to defaults first,
+            defaults to False.
+        :type reset: bool, optional
+        """
+
+        if reset:
+            self._write({path: None for path in self.directories + self.keys})
+            self.was_reset = True
+
+        self.snapshot = self.current()
+        self.dirty = False
+
+    def reset_or_restore(self) -> None:
+        """
+        Reset to defaults before the first scenario that needs a clean state,
+        restore the snapshot of the defaults before the following ones.
+        """
+
+        if self.was_reset:
+            self.restore()
+        else:
+            self.take_snapshot(reset=True)
+
+    def changes(self) -> dict:
+        """
+        Keys differing from the snapshot.
+
+        :return: Full key paths mapped to values to write, None resets the key.
+        :rtype: dict
+        """
+
+        current = self.current()
+        changes = {
+            key: value
+            for key, value in self.snapshot.items()
+            if current.get(key) != value
+        }
+        changes.update({key: None for key in current if key not in self.snapshot})
+
+        return changes
+
+    def restore(self) -> None:
+        """
+        Write back keys differing from the snapshot, skipped when state is clean.
+        """
+
+        if not self.dirty:
+            self.skipped += 1
+            return
+
+        start = perf_counter()
+        changes = self.changes()
+        if changes:
+            self._write(changes)
+        self.seconds += perf_counter() - start
+
+        self.restores += 1
+        self.keys_restored += len(changes)
+        self.dirty = False
+        log.debug(f"Restored {len(changes)} dconf keys: {sorted(changes)}")
+
+    def write(self, changes) -> None:
+        """
+        Write keys in one transaction, they are restored after the scenario.
+
+        :param changes: Full key paths mapped to values in GVariant text format,
+            None resets the key.
+        :type changes: dict
+        """
+
+        self.dirty = True
+        self._write(changes)
+
+    def _write(self, changes) -> None:
+        """
+        Write all changes in one transaction of the dconf writer service.
+
+        :param changes: Full key or directory paths mapped to values in GVariant
+            text format, None resets the key or the whole directory.
+        :type changes: dict
+        """
+
+        try:
+            # Import here so that the session bus is touched only once session is up.
+            from gi.repository import (  # pylint: disable=import-outside-toplevel
+                Gio,
+                GLib,
+            )
+
+            changeset = GLib.Variant(
+                "a{smv}",
+                {
+                    path: (
+                        None
+                        if value is None
+                        else GLib.Variant.parse(None, value, None, None)
+                    )
+                    for path, value in changes.items()
+                },
+            )
+            Gio.bus_get_sync(Gio.BusType.SESSION, None).call_sync(
+                DCONF_BUS_NAME,
+                DCONF_WRITER_PATH,
+                DCONF_WRITER_INTERFACE,
+                "Change",
+                GLib.Variant("(ay)", (changeset.get_data_as_bytes().get_data(),)),
+                GLib.VariantType.new("(s)"),
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None,
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            log.info(f"Batched dconf write failed, writing key by key: {error}")
+            for path, value in changes.items():
+                if value is None:
+                    run(f"dconf reset {'-f ' if path.endswith('/') else ''}{path}")
+                else:
+                    run(f"dconf write {path} {shlex.quote(value)}")
+
+    def summary(self) -> str:
+        """
+        Cost of the restoring in the whole run.
+
+        :rtype: str
+        """
+
+        return " ".join(
+            (
+                f"Dconf restored {self.restores} times",
+                f"({self.skipped} redundant restores skipped),",
+                f"{self.keys_restored} keys written",
+                f"in {self.seconds:.2f} seconds.",
+            )
+        )
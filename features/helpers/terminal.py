@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Access to the terminal widgets, their text and input.
+
+Text is typed key by key by default, which is what the functional scenarios
+test. Scenarios that only need the text in the shell, e.g. benchmarks, deliver
+it in one operation: inserted through the accessible EditableText interface of
+the terminal, which VTE writes to the pty, or pasted from the clipboard, with
+typing as the last resort.
+"""
+
+import shutil
+import subprocess
+from dogtail.rawinput import typeText, keyCombo  # pylint: disable=import-error
+from qecore.logger import Logging
+
+from helpers.wait import wait_until  # pylint: disable=import-error
+
+log = Logging().logger
+
+# Ordered from the fastest, a backend falls back to the ones after it.
+INPUT_BACKENDS = ("editable", "paste", "keys")
+
+CLIPBOARD_COMMANDS = {
+    "wayland": ("wl-copy",),
+    "x11": ("xclip", "-selection", "clipboard"),
+}
+
+# End of the delivered text searched for in the terminal.
+CONFIRM_CHARACTERS = 64
+
+
+def get_focused_terminal(context):
+    """
+    Get focused terminal widget.
+
+    The node is cached until a window, tab or focus change is reported.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :return: Accessible node of the focused terminal.
+    :rtype: <dogtail.tree.Node>
+    """
+
+    return context.terminal.node_cache.get(
+        "terminal",
+        "Terminal",
+        "focused",
+        lookup=lambda: context.terminal.instance.findChild(
+            lambda x: x.name == "Terminal" and x.roleName == "terminal" and x.focused
+        ),
+        validate=lambda node: node.focused,
+    )
+
+
+def get_tab_terminal(context, tab_name):
+    """
+    Get terminal widget of the given tab.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param tab_name: Tab name.
+    :type tab_name: str
+
+    :return: Accessible node of the terminal.
+    :rtype: <dogtail.tree.Node>
+    """
+
+    return context.terminal.node_cache.get(
+        "terminal",
+        "Terminal",
+        f"tab:{tab_name}",
+        lookup=lambda: context.terminal.instance.child(tab_name, "page tab").child(
+            "Terminal", "terminal"
+        ),
+        validate=lambda node: node.name == "Terminal",
+    )
+
+
+def text_tail(terminal, characters) -> str:
+    """
+    Last characters of the terminal text.
+
+    Only the end of the buffer is transferred, not the whole scrollback.
+
+    :param terminal: Accessible node of the terminal.
+    :type terminal: <dogtail.tree.Node>
+
+    :param characters: Number of characters to read.
+    :type characters: int
+
+    :rtype: str
+    """
+
+    text = terminal.queryText()
+    count = text.characterCount
+    return text.getText(max(0, count - characters), count)
+
+
+def prompt_is_shown(context) -> bool:
+    """
+    Check that the focused terminal shows a shell prompt.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :rtype: bool
+    """
+
+    return text_tail(get_focused_terminal(context), 256).rstrip().endswith(("$", "#"))
+
+
+def _insert_editable(context, text) -> bool:
+    editable = get_focused_terminal(context).queryEditableText()
+    # Length is in bytes of UTF-8, not in characters.
+    return bool(editable.insertText(0, text, len(text.encode())))
+
+
+def _insert_paste(context, text) -> bool:
+    command = CLIPBOARD_COMMANDS.get(context.sandbox.session_type)
+    if not command or not shutil.which(command[0]):
+        return False
+
+    subprocess.run(command, input=text.encode(), check=True, timeout=5)
+    keyCombo("<Shift><Ctrl><V>")
+    return True
+
+
+def text_is_shown(context, text) -> bool:
+    """
+    Check that the end of the text is shown at the end of the focused terminal.
+
+    Lines of the terminal may be wrapped, line breaks are not compared.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param text: Delivered text.
+    :type text: str
+
+    :rtype: bool
+    """
+
+    expected = text.replace("\n", "")[-CONFIRM_CHARACTERS:]
+    tail = text_tail(get_focused_terminal(context), 4 * CONFIRM_CHARACTERS)
+    return expected in tail.replace("\n", "")
+
+
+def insert_text(context, text, backend=None) -> str:
+    """
+    Deliver text to the focused terminal and confirm it was shown.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param text: Text to deliver, Enter is not pressed.
+    :type text: str
+
+    :param backend: First backend to try, defaults to context.input_backend.
+    :type backend: str, optional
+
+    :return: Backend that delivered the text.
+    :rtype: str
+    """
+
+    from gi.repository import GLib  # pylint: disable=import-outside-toplevel
+
+    backend = backend or getattr(context, "input_backend", "keys")
+    assert backend in INPUT_BACKENDS, f"Unknown input backend '{backend}'."
+
+    for candidate in INPUT_BACKENDS[INPUT_BACKENDS.index(backend) :]:
+        if candidate == "keys":
+            # Keys go to whatever is focused, nothing to confirm them in.
+            typeText(text)
+            return candidate
+
+        try:
+            delivered = (
+                _insert_editable(context, text)
+                if candidate == "editable"
+                else _insert_paste(context, text)
+            )
+        except (
+            NotImplementedError,
+            subprocess.SubprocessError,
+            OSError,
+            GLib.Error,
+        ) as error:
+            log.info(f"Input backend '{candidate}' failed: {error}")
+            continue
+
+        if delivered:
+            wait_until(
+                lambda: text_is_shown(context, text),
+                timeout=5,
+                message=f"Text delivered by '{candidate}' was not shown.",
+            )
+            return candidate
+
+    raise AssertionError("No input backend delivered the text.")
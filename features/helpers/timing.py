@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Wall time of steps, nested steps and scenario phases.
+
+Every finished step and phase is appended as one JSON object per line to the
+timing file. Steps run by context.execute_steps or helpers.compose get the hooks
+as well, they are recorded with their depth and the step they were run from.
+"""
+
+import json
+import re
+from contextlib import contextmanager
+from html import escape
+from time import perf_counter, time
+
+# Upper bounds of the histogram buckets in seconds.
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+SLOWEST_STEPS = 10
+
+
+def step_pattern(step_name) -> str:
+    """
+    Step name with quoted arguments left out, used to group the same steps.
+
+    :param step_name: Name of the step.
+    :type step_name: str
+
+    :rtype: str
+    """
+
+    return re.sub(r'"[^"]*"', '"…"', step_name)
+
+
+class StepTimer:
+    """
+    Recorder of step and phase timing of the whole run.
+    """
+
+    def __init__(self, output_file) -> None:
+        """
+        :param output_file: Path to the JSON Lines file, empty string disables it.
+        :type output_file: str
+        """
+
+        self.output_file = output_file
+        self.records = []
+        self.scenario_records = []
+        self._stack = []
+        self._scenario = None
+        self._feature = None
+        self._output = None
+
+        if output_file:
+            self._output = open(  # pylint: disable=consider-using-with
+                output_file, "w", encoding="utf-8", buffering=1
+            )
+
+    def _record(self, record) -> None:
+        record["scenario"] = self._scenario
+        record["feature"] = self._feature
+        record["timestamp"] = time()
+
+        self.records.append(record)
+        self.scenario_records.append(record)
+        if self._output:
+            self._output.write(json.dumps(record) + "\n")
+
+    def start_scenario(self, scenario) -> None:
+        """
+        Start recording of a scenario.
+
+        :param scenario: Scenario that is about to run.
+        :type scenario: <behave.model.Scenario>
+        """
+
+        self._scenario = scenario.name
+        self._feature = scenario.feature.name
+        self.scenario_records = []
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Record wall time of a scenario phase, e.g. 'setup' or 'teardown'.
+
+        :param name: Name of the phase.
+        :type name: str
+        """
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._record(
+                {"type": "phase", "phase": name, "seconds": perf_counter() - start}
+            )
+
+    def start_step(self, context, step) -> None:
+        """
+        Start timing of a step, called from before_step.
+
+        :param context: Holds contextual information during the running of tests.
+        :type context: <behave.runner.Context>
+
+        :param step: Step that is about to run.
+        :type step: <behave.model.Step>
+        """
+
+        if self._stack:
+            phase = self._stack[-1]["phase"]
+        elif step in getattr(context.scenario, "background_steps", ()):
+            phase = "background"
+        else:
+            phase = "body"
+
+        self._stack.append({"step": step, "phase": phase, "start": perf_counter()})
+
+    def stop_step(self, step) -> None:
+        """
+        Stop timing of a step and record it, called from after_step.
+
+        :param step: Step that finished.
+        :type step: <behave.model.Step>
+        """
+
+        # Steps of a failed execute_steps do not get the after_step hook.
+        while self._stack and self._stack[-1]["step"] is not step:
+            self._stack.pop()
+
+        if not self._stack:
+            return
+
+        entry = self._stack.pop()
+        self._record(
+            {
+                "type": "step",
+                "step": f"{step.keyword} {step.name}",
+                "pattern": step_pattern(step.name),
+                "phase": entry["phase"],
+                "depth": len(self._stack),
+                "parent": self._stack[-1]["step"].name if self._stack else None,
+                "status": step.status.name,
+                "seconds": perf_counter() - entry["start"],
+            }
+        )
+
+    def slowest_steps_html(self, count=SLOWEST_STEPS) -> str:
+        """
+        Table of the slowest steps of the current scenario.
+
+        :param count: Number of steps in the table, defaults to SLOWEST_STEPS.
+        :type count: int, optional
+
+        :rtype: str
+        """
+
+        rows = sorted(self.scenario_records, key=lambda x: x["seconds"], reverse=True)
+
+        return "".join(
+            (
+                "<table>",
+                "<tr><th>Seconds</th><th>Phase</th><th>Depth</th><th>Step</th></tr>",
+                *(
+                    "".join(
+                        (
+                            f"<tr><td>{x['seconds']:.3f}</td>",
+                            f"<td>{x['phase']}</td>",
+                            f"<td>{x.get('depth', '')}</td>",
+                            f"<td>{escape(x.get('step', x['phase']))}</td></tr>",
+                        )
+                    )
+                    for x in rows[:count]
+                ),
+                "</table>",
+            )
+        )
+
+    def histogram(self) -> str:
+        """
+        Aggregate of the whole run: top level step durations and the costliest steps.
+
+        :rtype: str
+        """
+
+        steps = [x for x in self.records if x["type"] == "step" and x["depth"] == 0]
+        if not steps:
+            return "Step timing: no steps recorded."
+
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for record in steps:
+            bucket = next(
+                (
+                    index
+                    for index, bound in enumerate(HISTOGRAM_BUCKETS)
+                    if record["seconds"] < bound
+                ),
+                len(HISTOGRAM_BUCKETS),
+            )
+            counts[bucket] += 1
+
+        labels = [f"< {bound}s" for bound in HISTOGRAM_BUCKETS]
+        labels.append(f">= {HISTOGRAM_BUCKETS[-1]}s")
+        scale = max(counts) / 50 if max(counts) > 50 else 1
+
+        totals = {}
+        for record in steps:
+            total = totals.setdefault(record["pattern"], [0, 0.0])
+            total[0] += 1
+            total[1] += record["seconds"]
+
+        phases = {}
+        for record in self.records:
+            if record["type"] == "phase" or record.get("depth") == 0:
+                phase = record["phase"]
+                phases[phase] = phases.get(phase, 0) + record["seconds"]
+
+        lines = [
+            f"Step timing: {len(steps)} top level steps.",
+            *(
+                f"{label:>8} {count:5d} {'#' * int(count / scale)}"
+                for label, count in zip(labels, counts)
+            ),
+            "Phases:",
+            *(f"{seconds:9.1f}s  {phase}" for phase, seconds in phases.items()),
+            "Costliest steps:",
+            *(
+                f"{seconds:9.1f}s {count:5d}x  {pattern}"
+                for pattern, (count, seconds) in sorted(
+                    totals.items(), key=lambda x: x[1][1], reverse=True
+                )[:15]
+            ),
+        ]
+
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """
+        Close the timing file.
+        """
+
+        if self._output:
+            self._output.close()
+            self._output = None
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Condition based waiting used by the steps instead of fixed sleeps.
+
+Every wait polls a predicate until it holds or the deadline passes. Polling starts
+fast and backs off, so a step returns as soon as its condition is met and slow
+machines are not hammered over D-Bus.
+"""
+
+from time import monotonic, sleep
+from qecore.utility import run
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_INTERVAL = 0.05
+DEFAULT_BACKOFF = 1.5
+MAX_INTERVAL = 1
+
+
+class WaitTimeout(AssertionError):
+    """
+    Raised when the awaited condition did not hold before the deadline.
+
+    Subclass of AssertionError so that behave reports the step as failed.
+    """
+
+
+def wait_until(
+    predicate,
+    timeout=DEFAULT_TIMEOUT,
+    message="Condition was not met.",
+    interval=DEFAULT_INTERVAL,
+    backoff=DEFAULT_BACKOFF,
+    max_interval=MAX_INTERVAL,
+    idle=sleep,
+):
+    """
+    Poll predicate until it returns truthy value or the timeout is reached.
+
+    Exceptions raised by the predicate are treated as a not yet met condition,
+    accessibility objects tend to raise while the application is changing its state.
+
+    :param predicate: Callable without arguments.
+    :type predicate: callable
+
+    :param timeout: Number of seconds to wait, defaults to DEFAULT_TIMEOUT.
+    :type timeout: float, optional
+
+    :param message: Description of the condition used in the timeout message,
+        callable is evaluated only when the timeout is reached.
+    :type message: str or callable, optional
+
+    :param interval: First delay between the checks, defaults to DEFAULT_INTERVAL.
+    :type interval: float, optional
+
+    :param backoff: Multiplier of the delay after every check, defaults to 1.5.
+    :type backoff: float, optional
+
+    :param max_interval: Upper limit of the delay, defaults to MAX_INTERVAL.
+    :type max_interval: float, optional
+
+    :param idle: Callable taking number of seconds to spend between checks.
+    :type idle: callable, optional
+
+    :return: The first truthy value returned by predicate.
+    :rtype: any
+
+    :raises WaitTimeout: When the condition did not hold in time.
+    """
+
+    start = monotonic()
+    deadline = start + timeout
+    attempts = 0
+    last_result = None
+    last_error = None
+
+    while True:
+        attempts += 1
+        try:
+            last_result = predicate()
+            last_error = None
+            if last_result:
+                return last_result
+        except Exception as error:  # pylint: disable=broad-except
+            last_error = error
+
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            break
+
+        idle(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+    if callable(message):
+        message = message()
+
+    raise WaitTimeout(
+        "\n".join(
+            (
+                f"\n{message}",
+                f"Timed out after '{monotonic() - start:.2f}' seconds",
+                f"and '{attempts}' checks.",
+                f"Last result: '{last_result}'",
+                f"Last error:  '{last_error}'",
+            )
+        )
+    )
+
+
+def wait_for_node_property(node, property_name, expected=True, **kwargs):
+    """
+    Wait until accessible node property has the expected value.
+
+    :param node: Accessible node.
+    :type node: <dogtail.tree.Node>
+
+    :param property_name: Name of the node property, e.g. 'showing' or 'sensitive'.
+    :type property_name: str
+
+    :param expected: Expected value, defaults to True.
+    :type expected: any, optional
+
+    :return: The node.
+    :rtype: <dogtail.tree.Node>
+    """
+
+    kwargs.setdefault(
+        "message",
+        f"Node '{node.name}' '{node.roleName}' {property_name} != '{expected}'.",
+    )
+
+    wait_until(lambda: getattr(node, property_name) == expected, **kwargs)
+    return node
+
+
+def wait_for_child(root, predicate, **kwargs):
+    """
+    Wait until a node matching predicate is found under root.
+
+    Single search without dogtail internal retries is done on every check.
+
+    :param root: Accessible node to search from.
+    :type root: <dogtail.tree.Node>
+
+    :param predicate: Predicate the node has to satisfy.
+    :type predicate: callable
+
+    :return: Found node.
+    :rtype: <dogtail.tree.Node>
+    """
+
+    kwargs.setdefault("message", f"Node was not found under '{root.name}'.")
+
+    return wait_until(
+        lambda: root.findChild(predicate, retry=False, requireResult=False), **kwargs
+    )
+
+
+def wait_for_geometry(node, predicate, **kwargs):
+    """
+    Wait until window geometry satisfies predicate.
+
+    :param node: Accessible node, usually a frame.
+    :type node: <dogtail.tree.Node>
+
+    :param predicate: Callable taking position and size tuples.
+    :type predicate: callable
+
+    :return: Tuple of position and size that satisfied the predicate.
+    :rtype: tuple
+    """
+
+    message = kwargs.pop("message", f"Geometry of '{node.name}' did not match.")
+    last = [None, None]
+
+    def check():
+        last[:] = tuple(node.position), tuple(node.size)
+        return tuple(last) if predicate(*last) else None
+
+    return wait_until(
+        check,
+        message=lambda: f"{message}\nPosition: '{last[0]}'\nSize:     '{last[1]}'",
+        **kwargs,
+    )
+
+
+def wait_for_stable_geometry(node, **kwargs):
+    """
+    Wait until size of the node is the same in two consecutive checks.
+
+    :param node: Accessible node, usually a frame.
+    :type node: <dogtail.tree.Node>
+
+    :return: Stable size.
+    :rtype: tuple
+    """
+
+    kwargs.setdefault("message", f"Size of '{node.name}' did not settle.")
+    # Consecutive checks have to be far enough apart to notice a running resize.
+    kwargs.setdefault("interval", 0.25)
+    previous = [None]
+
+    def check():
+        current = tuple(node.size)
+        stable = current == previous[0]
+        previous[0] = current
+        return current if stable else None
+
+    return wait_until(check, **kwargs)
+
+
+def wait_for_dconf_value(key, predicate, **kwargs):
+    """
+    Wait until value stored in dconf satisfies predicate.
+
+    :param key: Full dconf key path or callable returning it,
+        the path can depend on a state that is not written yet.
+    :type key: str or callable
+
+    :param predicate: Callable taking the stored value as string.
+    :type predicate: callable
+
+    :return: Stored value that satisfied the predicate.
+    :rtype: str
+    """
+
+    get_key = key if callable(key) else lambda: key
+    message = kwargs.pop("message", "Value stored in dconf did not match.")
+    last = [None]
+
+    def check():
+        last[0] = run(f"dconf read {get_key()}").strip("\n")
+        return (last[0],) if predicate(last[0]) else None
+
+    return wait_until(
+        check,
+        message=lambda: f"{message}\nStored value: '{last[0]}'",
+        **kwargs,
+    )[0]
@@ -1,10 +1,10 @@
 @basic_feature
+@require.menubar
 Feature: Basic Tests
 
   Background:
     * Start application "terminal" via "command"
-    * Make sure window is focused for wayland testing
-    * Make sure Menubar is showing
+    * Make sure required state is met
 
 
   @execute_command
@@ -20,7 +20,7 @@ Feature: Basic Tests
     * Left click "Select All" "menu item" in "terminal"
     * Key combo: "<Shift><Ctrl><C>"
     * Key combo: "<Shift><Ctrl><N>"
-    * Wait 1 second before action
+    * Wait for shell prompt
     * Key combo: "<Shift><Ctrl><V>"
     * Terminal contains string "test string"
 
@@ -33,8 +33,8 @@ Feature: Basic Tests
 
 
   @keyboard_shortcuts
+  @require.maximized
   Scenario: Enable/disable keyboard shortcuts.
-    * Key combo: "<Super><Up>"
     * Enable shortcuts
     * Key combo: "<Shift><Ctrl><N>"
     * Terminal has "2" windows
@@ -1,10 +1,10 @@
 @view_feature
+@require.menubar
 Feature: View properties
 
   Background:
     * Start application "terminal" via "command"
-    * Make sure window is focused for wayland testing
-    * Make sure Menubar is showing
+    * Make sure required state is met
 
 
   @zoom_in_shortcut
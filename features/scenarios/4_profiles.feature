@@ -1,10 +1,10 @@
 @profiles_feature
+@require.menubar
 Feature: Profiles feature
 
   Background:
     * Start application "terminal" via "command"
-    * Make sure window is focused for wayland testing
-    * Make sure Menubar is showing
+    * Make sure required state is met
 
 
   @create_profile
@@ -15,22 +15,21 @@ Feature: Profiles feature
 
   @delete_profile
   Scenario: Create and then delete profile for gnome-terminal-server
-    * Create profile named "myprofile"
+    * Seed profile named "myprofile"
     * Delete profile named "myprofile"
     * Profile named "myprofile" does not exist
 
 
   @edit_profile
   Scenario: Edit profile for gnome-terminal-server
-    * Create profile named "myprofile"
+    * Seed profile named "myprofile"
     * Open preferences
     * Item "myprofile" "label" is "showing" in "preferences"
 
 
   @change_profile
   Scenario: Change profile
-    * Create profile named "myprofile"
-    * Wait 2 seconds before action
+    * Seed profile named "myprofile"
     * Left click "Terminal" "menu" in "terminal"
     * Expand Change profile menu
     * Left click "myprofile" "radio menu item" in "terminal"
@@ -41,7 +40,7 @@ Feature: Profiles feature
 
   @change_profile_name
   Scenario: Change profile name
-    * Create profile named "myprofile"
+    * Seed profile named "myprofile"
     * Open preferences
     * Left click "myprofile" "label" in "preferences"
     * Open toggle menu of profile: "myprofile"
@@ -57,7 +56,7 @@ Feature: Profiles feature
 
   @starting_profile
   Scenario: Set profile to be started as default
-    * Create profile named "myprofile"
+    * Seed profile named "myprofile"
     * Open preferences
     * Left click "myprofile" "label" in "preferences"
     * Open toggle menu of profile: "myprofile"
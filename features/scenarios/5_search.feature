@@ -1,10 +1,10 @@
 @search_feature
+@require.menubar
 Feature: Search properties
 
   Background:
     * Start application "terminal" via "command"
-    * Make sure window is focused for wayland testing
-    * Make sure Menubar is showing
+    * Make sure required state is met
 
 
   @search_dialog_shortcut
@@ -14,8 +14,8 @@ Feature: Search properties
 
 
   @search_for_string
+  @require.maximized
   Scenario: Search for string
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test string"
     * Key combo: "<Ctrl><C>"
@@ -31,8 +31,8 @@ Feature: Search properties
 
   @rhbz1442629
   @search_for_string_match_case
+  @require.maximized
   Scenario: Search for string - match case
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test String"
     * Key combo: "<Ctrl><C>"
@@ -52,8 +52,8 @@ Feature: Search properties
 
 
   @search_for_string_entire_word
+  @require.maximized
   Scenario: Search for string - entire word
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test stringtogether"
     * Key combo: "<Ctrl><C>"
@@ -73,8 +73,8 @@ Feature: Search properties
 
 
   @search_for_string_regex
+  @require.maximized
   Scenario: Search for string - regular expression
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test String"
     * Key combo: "<Ctrl><C>"
@@ -95,8 +95,8 @@ Feature: Search properties
 
 
   @search_backwards
+  @require.maximized
   Scenario: Search backwards
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test string first"
     * Key combo: "<Ctrl><C>"
@@ -115,8 +115,8 @@ Feature: Search properties
 
 
   @search_next_shortcut
+  @require.maximized
   Scenario: Search next - shortcut
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test string first"
     * Key combo: "<Ctrl><C>"
@@ -140,8 +140,8 @@ Feature: Search properties
 
 
   @search_previous_shortcut
+  @require.maximized
   Scenario: Search previous - shortcut
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test string first"
     * Key combo: "<Ctrl><C>"
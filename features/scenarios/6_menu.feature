@@ -1,10 +1,10 @@
 @terminal_menu_feature
+@require.menubar
 Feature: Terminal Menu Functionality
 
   Background:
     * Start application "terminal" via "command"
-    * Make sure window is focused for wayland testing
-    * Make sure Menubar is showing
+    * Make sure required state is met
 
 
   @file_menu_new_tab
@@ -208,8 +208,8 @@ Feature: Terminal Menu Functionality
 
 
   @search_menu_find_next
+  @require.maximized
   Scenario: Search Menu Find Next
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test string first"
     * Key combo: "<Ctrl><C>"
@@ -234,8 +234,8 @@ Feature: Terminal Menu Functionality
 
 
   @search_menu_find_previous
+  @require.maximized
   Scenario: Search Menu Find Previous
-    * Key combo: "<Super><Up>"
     * Execute in terminal: "seq 50"
     * Type text: "test string first"
     * Key combo: "<Ctrl><C>"
@@ -0,0 +1,86 @@
+@benchmark_feature
+@editable_input
+Feature: Benchmark
+
+  Background:
+    * Start application "terminal" via "command"
+    * Make sure window is focused for wayland testing
+
+
+  @throughput
+  Scenario Outline: Output throughput - <kind> - <lines> lines
+    * Benchmark "<kind>" output of "<lines>" lines "<repeat>" times
+    * Benchmark results do not regress against baseline
+    Examples:
+      | kind  | lines    | repeat |
+      | plain | 10000    | 10     |
+      | plain | 100000   | 5      |
+      | plain | 1000000  | 5      |
+      | plain | 10000000 | 3      |
+      | ansi  | 10000    | 10     |
+      | ansi  | 100000   | 5      |
+      | ansi  | 1000000  | 5      |
+      | ansi  | 10000000 | 3      |
+
+
+  @keystroke_latency
+  Scenario Outline: Keystroke to echo latency - <load>
+    * Benchmark "<load>" keystroke latency of "100" keys and "20" bursts of "10"
+    * Benchmark results do not regress against baseline
+    Examples:
+      | load  |
+      | idle  |
+      | flood |
+
+
+  @startup
+  Scenario Outline: Startup latency - <mode>
+    * Benchmark "<mode>" startup "20" times
+    * Benchmark results do not regress against baseline
+    Examples:
+      | mode |
+      | cold |
+      | warm |
+
+
+  @scaling
+  Scenario Outline: Scaling - <total> <kind>
+    * Benchmark scaling to "<total>" "<kind>"
+    * Benchmark results do not regress against baseline
+    Examples:
+      | kind    | total |
+      | tabs    | 1     |
+      | tabs    | 10    |
+      | tabs    | 50    |
+      | tabs    | 100   |
+      | tabs    | 200   |
+      | windows | 1     |
+      | windows | 10    |
+      | windows | 50    |
+      | windows | 100   |
+      | windows | 200   |
+
+
+  @scrollback
+  Scenario Outline: Scrollback - <lines> lines - limit <limit>
+    * Benchmark scrollback of "<lines>" lines with limit "<limit>"
+    * Benchmark results do not regress against baseline
+    Examples:
+      | limit     | lines   |
+      | 30        | 2000000 |
+      | 10000     | 2000000 |
+      | 1000000   | 2000000 |
+      | unlimited | 2000000 |
+
+
+  @profile_count
+  Scenario Outline: Profile count - <count> profiles
+    * Make sure Menubar is showing
+    * Benchmark "<count>" profiles
+    * Benchmark results do not regress against baseline
+    Examples:
+      | count |
+      | 1     |
+      | 10    |
+      | 100   |
+      | 500   |
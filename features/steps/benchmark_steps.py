@@ -0,0 +1,1084 @@
+#!/usr/bin/env python3
+"""
+Benchmark steps measuring gnome-terminal performance through the accessible text.
+"""
+
+import os
+import shlex
+from itertools import count
+from subprocess import Popen, DEVNULL
+from time import perf_counter
+
+from behave import step  # pylint: disable=no-name-in-module
+from dogtail.rawinput import (  # pylint: disable=import-error
+    typeText,
+    pressKey,
+    keyCombo,
+)
+
+from helpers.dconf import PROFILES_PATH  # pylint: disable=import-error
+from helpers.procstat import (  # pylint: disable=import-error
+    ProcessSampler,
+    application_pid,
+    memory,
+    scrollback_files,
+)
+from helpers.selector import Selector, RoleIndex  # pylint: disable=import-error
+from helpers.wait import (  # pylint: disable=import-error
+    wait_until,
+    wait_for_node_property,
+)
+from helpers.terminal import (  # pylint: disable=import-error
+    get_focused_terminal,
+    insert_text,
+    prompt_is_shown,
+    text_tail,
+)
+
+# Sentinel is printed by printf so the typed command line does not contain it.
+SENTINEL = "DONE_{}"
+SENTINEL_COMMAND = "printf 'DONE_%s\\n' {}"
+
+# End of the buffer read on every check, enough for the sentinel and the prompt.
+TAIL_CHARACTERS = 512
+
+TOKENS = count(1)
+
+# Typed by the latency benchmark, none of them is printed by the flood command.
+LATENCY_CHARACTERS = "abcdefghijklmnopqrstuvwxyz"
+
+# Shortcuts opening a new tab or window in the focused window.
+SCALING_SHORTCUTS = {"tabs": "<Shift><Ctrl><T>", "windows": "<Shift><Ctrl><N>"}
+# Number of tabs or windows at which the accessibility tree walk is timed.
+SCALING_CHECKPOINTS = (1, 10, 50, 100, 200)
+TAB_SWITCHES = 20
+TREE_WALKS = 5
+
+# Fixed width lines, every line of the scrollback can be searched for.
+SCROLLBACK_COMMAND = "seq -f 'L%09g' 1 {lines}"
+SCROLLBACK_LINE = "L{:09d}"
+SCROLLBACK_SAMPLE_INTERVAL = 0.25
+SCROLLBACK_REPEATS = 5
+# Rows of the scrollback ring besides the printed lines: the returned prompt,
+# the sentinel row of VTE and some slack for prompts wrapped to more rows.
+SCROLLBACK_EXTRA_ROWS = 3
+SCROLLBACK_MARGIN = 5
+
+PROFILE_NAME = "bench{:04d}"
+PROFILE_REPEATS = 3
+FLOOD_COMMAND = "timeout {seconds} sh -c 'while :; do seq 1 1000; done' &"
+
+OUTPUT_COMMANDS = {
+    "plain": "seq 1 {lines}",
+    "ansi": "".join(
+        (
+            "seq 1 {lines} | awk '{{printf ",
+            '"\\033[%dm%s colored\\033[0m\\n", 31 + NR % 7, $0',
+            "}}'",
+        )
+    ),
+}
+
+
+def seq_bytes(lines) -> int:
+    """
+    Number of bytes printed by 'seq 1 lines'.
+
+    :param lines: Number of lines.
+    :type lines: int
+
+    :rtype: int
+    """
+
+    total = 0
+    digits = 1
+    while 10 ** (digits - 1) <= lines:
+        in_range = min(lines, 10**digits - 1) - 10 ** (digits - 1) + 1
+        total += in_range * (digits + 1)
+        digits += 1
+
+    return total
+
+
+def output_bytes(kind, lines) -> int:
+    """
+    Number of bytes printed by the output command.
+
+    :param kind: Kind of the output, key of OUTPUT_COMMANDS.
+    :type kind: str
+
+    :param lines: Number of lines.
+    :type lines: int
+
+    :rtype: int
+    """
+
+    if kind == "ansi":
+        # Color sequence, ' colored' and reset sequence on every line.
+        return seq_bytes(lines) + lines * (len("\033[31m") + 8 + len("\033[0m"))
+
+    return seq_bytes(lines)
+
+
+def prompt_returned(tail, sentinel) -> bool:
+    """
+    Check that the sentinel was printed and the prompt is back after it.
+
+    :param tail: End of the terminal text.
+    :type tail: str
+
+    :param sentinel: Sentinel line.
+    :type sentinel: str
+
+    :rtype: bool
+    """
+
+    _, found, after = tail.rpartition(sentinel)
+    return bool(found) and after.rstrip().endswith(("$", "#"))
+
+
+def run_timed_command(context, command, timeout) -> tuple:
+    """
+    Run command in the focused terminal and time its output.
+
+    Typing of the command is not measured, the clock starts with the Enter press.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param command: Command to execute.
+    :type command: str
+
+    :param timeout: Maximal number of seconds to wait for the prompt.
+    :type timeout: float
+
+    :return: Seconds until the sentinel was shown and until the prompt returned.
+    :rtype: tuple
+    """
+
+    token = f"{os.getpid()}{next(TOKENS)}"
+    sentinel = SENTINEL.format(token)
+    terminal = get_focused_terminal(context)
+
+    # Typing is not measured, the command is delivered in one operation.
+    insert_text(
+        context, f"{command}; {SENTINEL_COMMAND.format(token)}", backend="editable"
+    )
+    start = perf_counter()
+    pressKey("Enter")
+
+    sentinel_seconds = wait_until(
+        lambda: sentinel in text_tail(terminal, TAIL_CHARACTERS)
+        and perf_counter() - start,
+        timeout=timeout,
+        interval=0.005,
+        max_interval=0.02,
+        message=f"Sentinel '{sentinel}' was not shown.",
+    )
+    prompt_seconds = wait_until(
+        lambda: prompt_returned(text_tail(terminal, TAIL_CHARACTERS), sentinel)
+        and perf_counter() - start,
+        timeout=timeout,
+        interval=0.005,
+        max_interval=0.02,
+        message="Prompt did not return after the sentinel.",
+    )
+
+    return sentinel_seconds, prompt_seconds
+
+
+def record_metrics(context, metrics) -> None:
+    """
+    Record metrics of the scenario and embed them to the report.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param metrics: Tuples of name, samples, unit and direction of improvement,
+        optionally followed by a dict of details stored with the metric.
+    :type metrics: iterable
+    """
+
+    names = []
+    for name, samples, unit, higher_is_better, *details in metrics:
+        context.benchmark.record(
+            name, samples, unit, higher_is_better, **(details[0] if details else {})
+        )
+        names.append(name)
+
+    # Layer of the scenario, forgotten after it.
+    context.benchmark_names = getattr(context, "benchmark_names", []) + names
+    context.embed("text", context.benchmark.table(names), "Benchmark")
+
+
+@step('Benchmark "{kind}" output of "{lines:d}" lines "{repeat:d}" times')
+def benchmark_output_throughput(context, kind, lines, repeat) -> None:
+    """
+    Measure output throughput of the terminal.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param kind: Kind of the output, 'plain' or 'ansi' colored lines.
+    :type kind: str
+
+    :param lines: Number of printed lines.
+    :type lines: int
+
+    :param repeat: Number of measurements.
+    :type repeat: int
+    """
+
+    assert kind in OUTPUT_COMMANDS, f"Unknown output kind '{kind}'."
+
+    command = OUTPUT_COMMANDS[kind].format(lines=lines)
+    megabytes = output_bytes(kind, lines) / 10**6
+    timeout = max(60, lines / 10**4)
+
+    output_seconds = []
+    prompt_seconds = []
+    for _ in range(repeat):
+        sentinel_time, prompt_time = run_timed_command(context, command, timeout)
+        output_seconds.append(sentinel_time)
+        prompt_seconds.append(prompt_time)
+
+    name = f"throughput/{kind}/{lines}"
+    lines_per_second = [lines / x for x in output_seconds]
+    megabytes_per_second = [megabytes / x for x in output_seconds]
+    record_metrics(
+        context,
+        (
+            (f"{name}/lines", lines_per_second, "lines/s", True),
+            (f"{name}/megabytes", megabytes_per_second, "MB/s", True),
+            (f"{name}/prompt", prompt_seconds, "s", False),
+        ),
+    )
+
+
+@step("Benchmark results do not regress against baseline")
+def benchmark_results_do_not_regress(context) -> None:
+    """
+    Compare metrics recorded in the scenario with the baseline.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+    """
+
+    regressions = [
+        context.benchmark.regression(name)
+        for name in getattr(context, "benchmark_names", [])
+    ]
+    regressions = [x for x in regressions if x]
+
+    assert not regressions, "\n".join(("", *regressions))
+
+
+class EchoRecorder:
+    """
+    Text inserted to terminals as reported by text-changed events.
+    """
+
+    def __init__(self) -> None:
+        self.insertions = []
+
+    def __call__(self, event, received) -> None:
+        """
+        Listener callback.
+
+        :param event: AT-SPI event.
+        :type event: <Atspi.Event>
+
+        :param received: Time the event was received, by perf_counter.
+        :type received: float
+        """
+
+        if event.source.get_role_name() != "terminal":
+            return
+
+        text = event.any_data
+        if hasattr(text, "get_value"):
+            text = text.get_value()
+
+        self.insertions.append((received, str(text)))
+
+    def echo_times(self, characters, since) -> list:
+        """
+        Times the characters were shown, matched in order.
+
+        :param characters: Typed characters.
+        :type characters: str
+
+        :param since: Time the first character was typed, by perf_counter.
+        :type since: float
+
+        :return: Echo times of the characters shown so far.
+        :rtype: list
+        """
+
+        times = []
+        for received, text in self.insertions:
+            if received < since:
+                continue
+            for character in text:
+                if len(times) < len(characters) and character == characters[len(times)]:
+                    times.append(received)
+
+        return times
+
+
+def type_and_time(context, recorder, characters) -> list:
+    """
+    Type characters one by one and measure the latency of each echo.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param recorder: Recorder subscribed to text-changed events.
+    :type recorder: <EchoRecorder>
+
+    :param characters: Characters to type, not present in any other output.
+    :type characters: str
+
+    :return: Latencies in milliseconds.
+    :rtype: list
+    """
+
+    typed_times = []
+    for character in characters:
+        typed_times.append(perf_counter())
+        typeText(character)
+        # Receive events now, so that they are not timestamped after the burst.
+        context.listener.pump(0)
+
+    def all_shown():
+        echo_times = recorder.echo_times(characters, typed_times[0])
+        return echo_times if len(echo_times) == len(characters) else None
+
+    echo_times = context.listener.wait_for(
+        all_shown,
+        timeout=5,
+        message=f"Typed characters '{characters}' were not shown.",
+    )
+
+    return [(echo - typed) * 1000 for echo, typed in zip(echo_times, typed_times)]
+
+
+@step(
+    'Benchmark "{load}" keystroke latency of "{keys:d}" keys'
+    + ' and "{bursts:d}" bursts of "{length:d}"'
+)
+def benchmark_keystroke_latency(context, load, keys, bursts, length) -> None:
+    """
+    Measure time from a keystroke to the character shown in the terminal.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param load: 'idle' or 'flood' while a background command floods output.
+    :type load: str
+
+    :param keys: Number of single keystrokes.
+    :type keys: int
+
+    :param bursts: Number of bursts.
+    :type bursts: int
+
+    :param length: Number of keystrokes in a burst.
+    :type length: int
+    """
+
+    assert load in ("idle", "flood"), f"Unknown load '{load}'."
+    assert context.listener.active, "Latency is measured by AT-SPI events."
+    assert length <= len(LATENCY_CHARACTERS), "Burst is too long."
+
+    if load == "flood":
+        seconds = int(keys + bursts * length + 30)
+        typeText(FLOOD_COMMAND.format(seconds=seconds))
+        pressKey("Enter")
+
+    recorder = EchoRecorder()
+    subscription = context.listener.subscribe("object:text-changed:insert", recorder)
+    try:
+        single = []
+        for index in range(keys):
+            single += type_and_time(
+                context, recorder, LATENCY_CHARACTERS[index % len(LATENCY_CHARACTERS)]
+            )
+            if index % len(LATENCY_CHARACTERS) == len(LATENCY_CHARACTERS) - 1:
+                keyCombo("<Ctrl><U>")
+        keyCombo("<Ctrl><U>")
+
+        burst = []
+        for _ in range(bursts):
+            burst += type_and_time(context, recorder, LATENCY_CHARACTERS[:length])
+            keyCombo("<Ctrl><U>")
+    finally:
+        context.listener.unsubscribe(subscription)
+        if load == "flood":
+            typeText("kill %1")
+            pressKey("Enter")
+
+    name = f"latency/{load}"
+    record_metrics(
+        context,
+        (
+            (f"{name}/single", single, "ms", False),
+            (f"{name}/burst{length}", burst, "ms", False),
+        ),
+    )
+
+
+class StartupProbe:
+    """
+    Times of the first window and the first focused terminal after a launch.
+    """
+
+    def __init__(self, since) -> None:
+        """
+        :param since: Time of the launch, by perf_counter.
+        :type since: float
+        """
+
+        self.since = since
+        self.frame_time = None
+        self.focus_time = None
+
+    def on_window(self, event, received) -> None:  # pylint: disable=unused-argument
+        """
+        Listener callback of window:create.
+        """
+
+        if self.frame_time is None and received >= self.since:
+            self.frame_time = received
+
+    def on_focus(self, event, received) -> None:
+        """
+        Listener callback of object:state-changed:focused.
+        """
+
+        if (
+            self.focus_time is None
+            and received >= self.since
+            and event.detail1
+            and event.source.get_role_name() == "terminal"
+        ):
+            self.focus_time = received
+
+
+def window_count(context) -> int:
+    """
+    Number of terminal windows.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :rtype: int
+    """
+
+    return len(context.terminal.instance.findChildren(lambda x: x.roleName == "frame"))
+
+
+def time_startup(context, launch) -> tuple:
+    """
+    Launch a window and measure when it was shown, focused and got a prompt.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param launch: Callable opening the window.
+    :type launch: callable
+
+    :return: Milliseconds to the frame, to the focused terminal and to the prompt.
+    :rtype: tuple
+    """
+
+    start = perf_counter()
+    probe = StartupProbe(start)
+    subscriptions = (
+        context.listener.subscribe("window:create", probe.on_window),
+        context.listener.subscribe("object:state-changed:focused", probe.on_focus),
+    )
+
+    try:
+        launch()
+        frame_time = context.listener.wait_for(
+            lambda: probe.frame_time, timeout=30, message="Window was not created."
+        )
+        focus_time = context.listener.wait_for(
+            lambda: probe.focus_time, timeout=30, message="Terminal was not focused."
+        )
+
+        context.terminal.instance = context.terminal.get_root()
+        context.listener.wait_for(
+            lambda: prompt_is_shown(context),
+            timeout=30,
+            message="Prompt was not shown.",
+        )
+        prompt_time = perf_counter()
+    finally:
+        for subscription in subscriptions:
+            context.listener.unsubscribe(subscription)
+
+    return tuple((x - start) * 1000 for x in (frame_time, focus_time, prompt_time))
+
+
+@step('Benchmark "{mode}" startup "{iterations:d}" times')
+def benchmark_startup(context, mode, iterations) -> None:
+    """
+    Measure startup of a terminal window.
+
+    Cold start launches the server that is not running, warm start opens
+    a new window of the running server by the shortcut.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param mode: 'cold' or 'warm'.
+    :type mode: str
+
+    :param iterations: Number of measurements.
+    :type iterations: int
+    """
+
+    assert mode in ("cold", "warm"), f"Unknown startup mode '{mode}'."
+    assert context.listener.active, "Startup is measured by AT-SPI events."
+
+    samples = []
+    for _ in range(iterations):
+        if mode == "cold":
+            # Warm mode of the suite keeps the server, here it has to go.
+            kill = context.terminal.kill
+            context.terminal.kill = True
+            context.terminal.kill_application()
+            context.terminal.kill = kill
+            wait_until(
+                lambda: not context.terminal.is_running(),
+                message="Terminal server is still running.",
+            )
+
+            samples.append(
+                time_startup(
+                    context,
+                    lambda: Popen(  # pylint: disable=consider-using-with
+                        shlex.split(context.terminal.exec),
+                        stdout=DEVNULL,
+                        stderr=DEVNULL,
+                    ),
+                )
+            )
+        else:
+            samples.append(time_startup(context, lambda: keyCombo("<Shift><Ctrl><N>")))
+            keyCombo("<Shift><Ctrl><W>")
+            context.listener.wait_for(
+                lambda: window_count(context) == 1,
+                timeout=10,
+                message="New window was not closed.",
+            )
+
+    name = f"startup/{mode}"
+    record_metrics(
+        context,
+        (
+            (f"{name}/frame", [x[0] for x in samples], "ms", False),
+            (f"{name}/focus", [x[1] for x in samples], "ms", False),
+            (f"{name}/prompt", [x[2] for x in samples], "ms", False),
+        ),
+    )
+
+
+def time_to_focus(context, action, message) -> float:
+    """
+    Run the action and wait for a terminal to be focused.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param action: Callable changing the focused terminal.
+    :type action: callable
+
+    :param message: Assertion message when no terminal was focused.
+    :type message: str
+
+    :return: Milliseconds to the focus event.
+    :rtype: float
+    """
+
+    start = perf_counter()
+    probe = StartupProbe(start)
+    subscription = context.listener.subscribe(
+        "object:state-changed:focused", probe.on_focus
+    )
+    try:
+        action()
+        focus_time = context.listener.wait_for(
+            lambda: probe.focus_time, timeout=30, message=message
+        )
+    finally:
+        context.listener.unsubscribe(subscription)
+
+    return (focus_time - start) * 1000
+
+
+def time_tree_walk(context) -> float:
+    """
+    Time a full search of the terminal widgets in the accessibility tree.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :return: Milliseconds of the search.
+    :rtype: float
+    """
+
+    start = perf_counter()
+    context.terminal.instance.findChildren(lambda x: x.roleName == "terminal")
+    return (perf_counter() - start) * 1000
+
+
+def scaling_curve_text(curve) -> str:
+    """
+    Text table of the scaling curve.
+
+    :param curve: Points of the curve.
+    :type curve: list
+
+    :rtype: str
+    """
+
+    def value(point, key, number_format):
+        return "-" if point.get(key) is None else format(point[key], number_format)
+
+    return "\n".join(
+        (
+            " ".join(
+                (
+                    f"{'count':>6}",
+                    f"{'create ms':>10}",
+                    f"{'RSS kB':>10}",
+                    f"{'PSS kB':>10}",
+                    f"{'walk ms':>9}",
+                )
+            ),
+            *(
+                " ".join(
+                    (
+                        f"{point['count']:6d}",
+                        f"{value(point, 'create', '.1f'):>10}",
+                        f"{value(point, 'rss', 'd'):>10}",
+                        f"{value(point, 'pss', 'd'):>10}",
+                        f"{value(point, 'walk', '.1f'):>9}",
+                    )
+                )
+                for point in curve
+            ),
+        )
+    )
+
+
+@step('Benchmark scaling to "{total:d}" "{kind}"')
+def benchmark_scaling(context, total, kind) -> None:
+    """
+    Measure creation of tabs or windows one by one up to the total.
+
+    Every created tab or window adds a point to the curve with the creation
+    time and memory of the server, so superlinear growth is visible.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param total: Number of tabs or windows to end up with.
+    :type total: int
+
+    :param kind: 'tabs' or 'windows'.
+    :type kind: str
+    """
+
+    assert kind in SCALING_SHORTCUTS, f"Unknown scaling kind '{kind}'."
+    assert context.listener.active, "Creation is measured by AT-SPI events."
+
+    server = application_pid(context.terminal)
+    assert server, "Terminal server process was not found."
+
+    curve = [
+        {"count": 1, "create": None, **memory(server), "walk": time_tree_walk(context)}
+    ]
+    for number in range(2, total + 1):
+        create = time_to_focus(
+            context,
+            lambda: keyCombo(SCALING_SHORTCUTS[kind]),
+            f"New terminal number {number} was not focused.",
+        )
+        curve.append(
+            {
+                "count": number,
+                "create": create,
+                **memory(server),
+                "walk": (
+                    time_tree_walk(context) if number in SCALING_CHECKPOINTS else None
+                ),
+            }
+        )
+
+    context.embed("text", scaling_curve_text(curve), "Scaling curve")
+
+    name = f"scaling/{kind}/{total}"
+    metrics = [
+        (
+            f"{name}/walk",
+            [time_tree_walk(context) for _ in range(TREE_WALKS)],
+            "ms",
+            False,
+        )
+    ]
+    if total > 1:
+        created = [x["create"] for x in curve[1:]]
+        growth = (curve[-1]["pss"] or curve[-1]["rss"]) - (
+            curve[0]["pss"] or curve[0]["rss"]
+        )
+        metrics += [
+            (f"{name}/create", created, "ms", False, {"curve": curve}),
+            (f"{name}/memory_per_{kind[:-1]}", [growth / (total - 1)], "kB", False),
+        ]
+
+    if kind == "tabs" and total > 1:
+        metrics.append(
+            (
+                f"{name}/switch",
+                [
+                    time_to_focus(
+                        context,
+                        lambda: keyCombo("<Ctrl><Page_Up>"),
+                        "Previous tab was not focused.",
+                    )
+                    for _ in range(TAB_SWITCHES)
+                ],
+                "ms",
+                False,
+            )
+        )
+
+    record_metrics(context, metrics)
+
+
+def set_scrollback_limit(context, limit) -> None:
+    """
+    Set scrollback of the default profile.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param limit: Number of lines or 'unlimited'.
+    :type limit: str
+    """
+
+    profile = f"{PROFILES_PATH}:{context.dconf.profile_uuid}/"
+    unlimited = limit == "unlimited"
+    changes = {f"{profile}scrollback-unlimited": "true" if unlimited else "false"}
+    if not unlimited:
+        changes[f"{profile}scrollback-lines"] = limit
+
+    context.dconf_state.write(changes)
+    context.dconf.wait_for_value(
+        "scrollback-unlimited", changes[f"{profile}scrollback-unlimited"]
+    )
+    if not unlimited:
+        context.dconf.wait_for_value("scrollback-lines", limit)
+
+
+def time_search(context, line) -> float:
+    """
+    Search the scrollback for the line and time until it is highlighted.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param line: Text of the line.
+    :type line: str
+
+    :return: Milliseconds until the line was highlighted.
+    :rtype: float
+    """
+
+    terminal = get_focused_terminal(context)
+    terminal.queryText().removeSelection(0)
+
+    keyCombo("<Shift><Ctrl><F>")
+    search = context.terminal.instance.child("Search", "text")
+    search.text = line
+    wait_for_node_property(search, "text", line)
+
+    start = perf_counter()
+    pressKey("Enter")
+    seconds = wait_until(
+        lambda: terminal.queryText().getNSelections() > 0 and perf_counter() - start,
+        timeout=60,
+        interval=0.005,
+        max_interval=0.05,
+        message=f"Line '{line}' was not highlighted.",
+    )
+    pressKey("Esc")
+
+    return seconds * 1000
+
+
+def time_scroll(context, keys) -> float:
+    """
+    Scroll by the key combination and time until the visible text changed.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param keys: Key combination, e.g. '<Shift><Home>'.
+    :type keys: str
+
+    :return: Milliseconds until the change was reported.
+    :rtype: float
+    """
+
+    start = perf_counter()
+    changed = []
+
+    def on_change(event, received) -> None:  # pylint: disable=unused-argument
+        if received >= start:
+            changed.append(received)
+
+    subscription = context.listener.subscribe("object:visible-data-changed", on_change)
+    try:
+        keyCombo(keys)
+        context.listener.wait_for(
+            lambda: changed, timeout=30, message=f"'{keys}' did not scroll."
+        )
+    finally:
+        context.listener.unsubscribe(subscription)
+
+    return (changed[0] - start) * 1000
+
+
+@step('Benchmark scrollback of "{lines:d}" lines with limit "{limit}"')
+def benchmark_scrollback(context, lines, limit) -> None:
+    """
+    Fill the scrollback under the limit and measure memory, search and scrolling.
+
+    Memory of the server and size of VTE scrollback files are sampled
+    while the buffer fills.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param lines: Number of printed lines.
+    :type lines: int
+
+    :param limit: Scrollback limit in lines or 'unlimited'.
+    :type limit: str
+    """
+
+    assert limit == "unlimited" or limit.isdigit(), f"Unknown limit '{limit}'."
+    assert context.listener.active, "Scrolling is measured by AT-SPI events."
+
+    server = application_pid(context.terminal)
+    assert server, "Terminal server process was not found."
+
+    set_scrollback_limit(context, limit)
+
+    sampler = ProcessSampler(
+        lambda: {**memory(server), **scrollback_files(server)},
+        SCROLLBACK_SAMPLE_INTERVAL,
+    )
+    sampler.start()
+    try:
+        fill_seconds, _ = run_timed_command(
+            context,
+            SCROLLBACK_COMMAND.format(lines=lines),
+            timeout=max(60, lines / 1e4),
+        )
+    finally:
+        samples = sampler.stop()
+    assert samples, f"Server memory was not sampled: {sampler.error}"
+
+    context.embed(
+        "text",
+        "\n".join(
+            f"{x['seconds']:8.2f}s RSS {x['rss']:8d} kB"
+            f" scrollback files {x['scrollback_files']} {x['scrollback_kb']:8d} kB"
+            for x in samples
+        ),
+        "Scrollback memory",
+    )
+
+    # Old line surely still kept, searched from the bottom of the buffer.
+    # The limit counts every row of the ring, not only the printed lines.
+    oldest = 1
+    if limit != "unlimited":
+        oldest = min(
+            lines,
+            max(1, lines - int(limit) + SCROLLBACK_EXTRA_ROWS + SCROLLBACK_MARGIN),
+        )
+    searches = [
+        time_search(context, SCROLLBACK_LINE.format(oldest))
+        for _ in range(SCROLLBACK_REPEATS)
+    ]
+
+    scrolls = []
+    for _ in range(SCROLLBACK_REPEATS):
+        scrolls.append(time_scroll(context, "<Shift><Home>"))
+        time_scroll(context, "<Shift><End>")
+
+    name = f"scrollback/{limit}/{lines}"
+    record_metrics(
+        context,
+        (
+            (f"{name}/fill", [fill_seconds], "s", False),
+            (f"{name}/rss", [samples[-1]["rss"]], "kB", False, {"curve": samples}),
+            (f"{name}/peak_rss", [max(x["rss"] for x in samples)], "kB", False),
+            (f"{name}/disk", [samples[-1]["scrollback_kb"]], "kB", False),
+            (f"{name}/search", searches, "ms", False),
+            (f"{name}/scroll_to_top", scrolls, "ms", False),
+        ),
+    )
+
+
+def showing_count(root, role_name, names) -> int:
+    """
+    Number of the named nodes of the role that are showing.
+
+    :param root: Node to search in.
+    :type root: <dogtail.tree.Node>
+
+    :param role_name: Role name of the nodes.
+    :type role_name: str
+
+    :param names: Names of the nodes.
+    :type names: set
+
+    :rtype: int
+    """
+
+    nodes = RoleIndex(root, (role_name,)).find_all(Selector(role_name, showing=True))
+    return len({x.name for x in nodes} & names)
+
+
+def open_profile_menu(context, names) -> float:
+    """
+    Open Change Profile menu and wait until all profiles are showing in it.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param names: Names of the profiles.
+    :type names: set
+
+    :return: Milliseconds from the expanding until all items were showing.
+    :rtype: float
+    """
+
+    context.composer.run(context, '* Left click "Terminal" "menu" in "terminal"')
+    start = perf_counter()
+    context.composer.run(context, "* Expand Change profile menu")
+    context.listener.wait_for(
+        lambda: showing_count(context.terminal.instance, "radio menu item", names)
+        == len(names),
+        timeout=60,
+        message="Not all profiles are showing in Change Profile menu.",
+    )
+
+    return (perf_counter() - start) * 1000
+
+
+def process_memory(application) -> dict:
+    """
+    Memory of the process of the application.
+
+    :param application: Application handle.
+    :type application: <qecore.application.Application>
+
+    :return: RSS and PSS in kB, empty when the process is not running.
+    :rtype: dict
+    """
+
+    pid = application_pid(application)
+    return memory(pid) if pid else {}
+
+
+@step('Benchmark "{count:d}" profiles')
+def benchmark_profiles(context, count) -> None:
+    """
+    Seed the profiles and measure the preferences window and Change Profile menu.
+
+    Switching is measured from the click on the radio menu item until the
+    reopened menu shows it checked.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param count: Number of seeded profiles.
+    :type count: int
+    """
+
+    assert count > 0, "At least one profile has to be seeded."
+    assert context.listener.active, "Menus are measured by AT-SPI events."
+
+    before = process_memory(context.terminal)
+    assert before, "Memory of the terminal server was not sampled."
+    seed_start = perf_counter()
+    context.profiles.seed({PROFILE_NAME.format(x): {} for x in range(count)})
+    seed_seconds = perf_counter() - seed_start
+    names = set(context.dconf.profiles().values())
+
+    opening = []
+    preferences = {}
+    for _ in range(PROFILE_REPEATS):
+        start = perf_counter()
+        context.preferences_session.open(context)
+        context.listener.wait_for(
+            lambda: showing_count(context.preferences.instance, "label", names)
+            == len(names),
+            timeout=60,
+            message="Not all profiles are listed in preferences.",
+        )
+        opening.append((perf_counter() - start) * 1000)
+        preferences = process_memory(context.preferences) or preferences
+        context.preferences_session.close(context)
+
+    expanding = []
+    switching = []
+    for repeat in range(PROFILE_REPEATS):
+        expanding.append(open_profile_menu(context, names))
+
+        target = PROFILE_NAME.format(repeat % count)
+        start = perf_counter()
+        context.composer.run(
+            context, f'* Left click "{target}" "radio menu item" in "terminal"'
+        )
+        open_profile_menu(context, names)
+        item = RoleIndex(context.terminal.instance, ("radio menu item",)).find(
+            Selector("radio menu item", name=target, showing=True)
+        )
+        context.listener.wait_for(
+            lambda: item.checked,
+            timeout=10,
+            message=f"Profile '{target}' was not switched to.",
+        )
+        switching.append((perf_counter() - start) * 1000)
+        pressKey("Esc")
+        pressKey("Esc")
+
+    after = process_memory(context.terminal)
+    assert after, "Memory of the terminal server was not sampled."
+    name = f"profiles/{count}"
+    metrics = [
+        (f"{name}/seed", [seed_seconds], "s", False),
+        (f"{name}/preferences", opening, "ms", False),
+        (f"{name}/menu", expanding, "ms", False),
+        (f"{name}/server_rss", [after["rss"]], "kB", False),
+        (
+            f"{name}/server_growth_per_profile",
+            [(after["rss"] - before["rss"]) / count],
+            "kB",
+            False,
+        ),
+        (f"{name}/switch", switching, "ms", False),
+    ]
+    if preferences:
+        metrics.append((f"{name}/preferences_rss", [preferences["rss"]], "kB", False))
+
+    record_metrics(context, metrics)
@@ -3,7 +3,6 @@
 Main file where the python code is located for execution via behave.
 """
 
-from time import sleep
 from behave import step  # pylint: disable=no-name-in-module
 from dogtail.rawinput import (  # pylint: disable=import-error
     keyCombo,
@@ -18,8 +17,67 @@ from qecore.common_steps import *  # pylint: disable=unused-wildcard-import,wild
 
 from qecore.logger import Logging
 
+from helpers.wait import (  # pylint: disable=import-error
+    WaitTimeout,
+    wait_until,
+    wait_for_child,
+    wait_for_node_property,
+    wait_for_geometry,
+    wait_for_stable_geometry,
+)
+from helpers.selector import Selector, shared_index  # pylint: disable=import-error
+from helpers.preferences import uses_preferences  # pylint: disable=import-error
+from helpers.compose import macro  # pylint: disable=import-error
+from helpers.profiles import wait_for_server  # pylint: disable=import-error
+from helpers.terminal import (  # pylint: disable=import-error
+    get_focused_terminal,
+    get_tab_terminal,
+    insert_text,
+    prompt_is_shown,
+)
+
 LOGGING = Logging()
 
+# Roles looked up in the preferences window, indexed once for all the lookups.
+PREFERENCES_ROLES = ("frame", "dialog", "push button", "spin button")
+
+macro(
+    "change profile menu",
+    '* Left click "Terminal" "menu" in "terminal"',
+    '* Left click "Change Profile" "menu" in "terminal"',
+)
+macro(
+    "set tab title",
+    '* Left click "Terminal" "menu" in "terminal"',
+    '* Left click "Set Title" "menu item" in "terminal"',
+    '* Item "Set Title" "alert" is "showing" in "terminal"',
+    '* Type text: "{title}"',
+    '* Left click "OK" "push button" in "terminal"',
+    '* Type text: "{title}"',
+    '* Press key: "Enter"',
+)
+
+
+def input_backend(context) -> str:
+    """
+    Input backend of the current scenario.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :return: Backend name, 'keys' for scenarios testing keyboard handling,
+        'editable' for scenarios opting out of typing.
+    :rtype: str
+    """
+
+    if "keyboard_input" in context.scenario.effective_tags:
+        return "keys"
+
+    if "editable_input" in context.scenario.effective_tags:
+        return "editable"
+
+    return context.input_backend
+
 
 @step("Make sure window is focused for wayland testing")
 def wait_some_ammount_of_time(context) -> None:
@@ -30,12 +88,33 @@ def wait_some_ammount_of_time(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    # Attempt to prevent race conditions.
-    sleep(2)
+    wait_for_child(
+        context.terminal.instance,
+        lambda x: x.roleName == "frame" and x.showing,
+        message="Terminal window is not showing.",
+    )
 
     if context.sandbox.session_type == "wayland":
         context.terminal.instance.children[0].click()
 
+    wait_for_child(
+        context.terminal.instance,
+        lambda x: x.roleName == "terminal" and x.focused,
+        message="Terminal window is not focused.",
+    )
+
+
+@step("Make sure required state is met")
+def make_sure_required_state_is_met(context) -> None:
+    """
+    Verify the state declared by '@require.*' tags, see helpers.requirements.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+    """
+
+    context.requirements.verify(context)
+
 
 @step("Make sure Menubar is showing")
 def make_sure_menubar_is_showing(context) -> None:
@@ -48,16 +127,25 @@ def make_sure_menubar_is_showing(context) -> None:
 
     menubar = context.terminal.instance.child(roleName="menu bar")
     for _ in range(10):
-        if not (menubar.showing and menubar.visible):
-            terminal_frame = context.terminal.instance.child(roleName="frame")
-            sleep(1)
-            terminal_frame.click(3)
-            try:
-                context.execute_steps(
-                    '* Left click "Show Menubar" "check menu item" in "terminal"'
-                )
-            except Exception:  # pylint: disable=broad-except
-                pressKey("Esc")
+        if menubar.showing and menubar.visible:
+            return
+
+        terminal_frame = context.terminal.instance.child(roleName="frame")
+        wait_for_node_property(terminal_frame, "showing")
+        terminal_frame.click(3)
+        try:
+            context.composer.run(
+                context, '* Left click "Show Menubar" "check menu item" in "terminal"'
+            )
+            wait_until(
+                lambda: menubar.showing and menubar.visible,
+                timeout=2,
+                message="Menubar is not showing.",
+            )
+        except Exception:  # pylint: disable=broad-except
+            pressKey("Esc")
+
+    assert menubar.showing and menubar.visible, "Menubar failed to show."
 
 
 @step("Expand Change profile menu")
@@ -70,12 +158,17 @@ def expand_menu_workaround(context) -> None:
     """
 
     if context.sandbox.session_type == "x11":
-        context.execute_steps('* Mouse over "Change Profile" "menu" in "terminal"')
+        context.composer.run(
+            context, '* Mouse over "Change Profile" "menu" in "terminal"'
+        )
     else:  # context.sandbox.session_type == "wayland"
-        context.execute_steps('* Left click "Change Profile" "menu" in "terminal"')
+        context.composer.run(
+            context, '* Left click "Change Profile" "menu" in "terminal"'
+        )
 
 
 @step('Open toggle menu of profile: "{profile_name}"')
+@uses_preferences
 def open_new_profile_toggle_menu(context, profile_name) -> None:
     """
     Open toggle menu of given profile.
@@ -93,10 +186,14 @@ def open_new_profile_toggle_menu(context, profile_name) -> None:
 
 
 @step('Execute in terminal: "{command}"')
-def execute_command(context, command) -> None:  # pylint: disable=unused-argument
+def execute_command(context, command) -> None:
     """
     Execute command in terminal.
 
+    The command is typed key by key unless 'input_backend' in behave.ini says
+    otherwise, scenarios tagged 'editable_input' deliver it in one operation
+    and press Enter once it is shown.
+
     :param context: Holds contextual information during the running of tests.
     :type context: <behave.runner.Context>
 
@@ -104,11 +201,76 @@ def execute_command(context, command) -> None:  # pylint: disable=unused-argumen
     :type command: str
     """
 
-    typeText(command)
+    insert_text(context, command, backend=input_backend(context))
+    context.shell.mark()
     pressKey("Enter")
 
 
+@step("Wait for command to finish")
+def wait_for_command_to_finish(context) -> None:
+    """
+    Wait until the shell reports a prompt after the last executed command.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+    """
+
+    context.shell.wait_for_prompt(lambda: prompt_is_shown(context))
+
+
+@step("Wait for shell prompt")
+def wait_for_shell_prompt(context) -> None:
+    """
+    Wait until a newly started shell, of a new tab or window, shows its prompt.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+    """
+
+    context.shell.wait_for_new_shell(lambda: prompt_is_shown(context))
+
+
+@step('Last command exited with status "{status:d}"')
+def last_command_exited_with_status(context, status) -> None:
+    """
+    Assert exit status of the last executed command.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param status: Expected exit status.
+    :type status: int
+    """
+
+    if context.shell.pending:
+        context.shell.wait_for_prompt(lambda: prompt_is_shown(context))
+
+    last_status = context.shell.last_status()
+    assert last_status == status, "".join(
+        (
+            f"Last command exited with status '{last_status}',",
+            f" expected '{status}'.",
+        )
+    )
+
+
+@step('Insert text: "{text}"')
+def insert_text_to_terminal(context, text) -> None:
+    """
+    Insert text to the focused terminal in one operation, without Enter.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param text: Text to insert.
+    :type text: str
+    """
+
+    insert_text(context, text, backend=input_backend(context))
+
+
 @step('Select option in row: "{color_row}" and column: "{color_column}"')
+@uses_preferences
 def select_option_in_row_and_column(context, color_row, color_column) -> None:
     """
     Select option in a given row and column.
@@ -134,27 +296,29 @@ def select_option_in_row_and_column(context, color_row, color_column) -> None:
     }
 
     menu_target = context.preferences.instance.child("Text and Background Color").parent
-    color_target = menu_target.findChildren(
-        lambda x: x.roleName == "push button" and x.showing
-    )
+    color_target = shared_index(
+        context.listener, menu_target, ("push button",)
+    ).find_all(Selector("push button", showing=True))
     index = color_setting[color_row, color_column]
     color_target[index].click()
 
-    choose_terminal_dialog = context.preferences.instance.findChild(
-        lambda x: "Choose Terminal" in x.name and x.roleName == "dialog"
+    choose_terminal_dialog = wait_until(
+        lambda: shared_index(
+            context.listener, context.preferences.instance, PREFERENCES_ROLES
+        ).find(Selector("dialog", name_contains="Choose Terminal")),
+        message="Dialog 'Choose Terminal' was not found.",
     )
 
-    for _ in range(5):
-        if not choose_terminal_dialog.sensitive:
-            LOGGING.info(
-                f"Dialog '{choose_terminal_dialog.name}' is not sensitive yet."
-            )
-            sleep(1)
-        else:
-            break
+    context.listener.wait_for_state(
+        choose_terminal_dialog,
+        "sensitive",
+        timeout=5,
+        message=f"Dialog '{choose_terminal_dialog.name}' is not sensitive.",
+    )
 
 
 @step('Change color to: "{color_hex_value}"')
+@uses_preferences
 def change_color_to(context, color_hex_value) -> None:
     """
     Change color to given color.
@@ -172,6 +336,7 @@ def change_color_to(context, color_hex_value) -> None:
 
 
 @step('Set spin button to: "{set_value}"')
+@uses_preferences
 def set_spin_button_to(context, set_value) -> None:
     """
     Set value to spin button.
@@ -183,12 +348,12 @@ def set_spin_button_to(context, set_value) -> None:
     :type set_value: str
     """
 
-    target = context.preferences.instance.findChildren(
-        lambda x: x.name == ""
-        and x.roleName == "spin button"
-        and x.sensitive
-        and x.showing
-    )[0]
+    target = wait_until(
+        lambda: shared_index(
+            context.listener, context.preferences.instance, PREFERENCES_ROLES
+        ).find(Selector("spin button", name="", sensitive=True, showing=True)),
+        message="Sensitive spin button was not found in preferences.",
+    )
 
     click(
         target.position[0] + target.size[0] / 2 - 10,
@@ -224,35 +389,21 @@ def profile_option_is_set_to(  # pylint: disable=unused-argument
     :type negation: str, optional
     """
 
-    # Prevent race on slower machines.
-    sleep(3)
-
-    dconf = "/org/gnome/terminal/legacy/profiles:/"
-
-    profile_id = run(f"dconf list {dconf}")
-    profile_id = profile_id.strip("\n")
-
-    stored_value = run(f"dconf read {dconf}{profile_id}{color_opt}")
-    stored_value = stored_value.strip("\n")
-
-    if negation:
-        assert exp_value not in stored_value, " ".join(
-            (
-                "Expected value does not differ from actually stored value!",
-                f"'{exp_value}' == '{stored_value}'",
-            )
-        )
-
-    else:
-        assert exp_value in stored_value, " ".join(
-            (
-                "Expected value differs from actually stored value! ",
-                f"'{exp_value}' != '{stored_value}'",
-            )
-        )
+    # The profile is written to dconf asynchronously, wait for the value.
+    context.dconf.wait_for_value(
+        color_opt,
+        exp_value,
+        negation=bool(negation),
+        message=(
+            "Expected value does not differ from actually stored value!"
+            if negation
+            else "Expected value differs from actually stored value!"
+        ),
+    )
 
 
 @step('Set "{option}" to "{value}" under: "{under_given_menu}"')
+@uses_preferences
 def set_values_to_combo_box(context, option, value, under_given_menu) -> None:
     """
     Set values to combo box.
@@ -278,17 +429,22 @@ def set_values_to_combo_box(context, option, value, under_given_menu) -> None:
         try:
             combo_box_target = item_target.child(roleName="combo box")
             combo_box_target.click()
-            sleep(1)
-            context.execute_steps(
-                f'* Left click "{value}" "menu item" in "preferences"'
+            wait_for_child(
+                context.preferences.instance,
+                lambda x: x.name == value and x.roleName == "menu item" and x.showing,
+                timeout=3,
+                message=f"Menu item '{value}' is not showing.",
+            )
+            context.composer.run(
+                context, f'* Left click "{value}" "menu item" in "preferences"'
             )
             break
         except Exception:  # pylint: disable=broad-except
             LOGGING.info("Combo box presumably failed to open, retrying.")
-            sleep(1)
 
 
 @step("Reset settings")
+@uses_preferences
 def reset_settings(context) -> None:
     """
     Reset settings.
@@ -297,17 +453,18 @@ def reset_settings(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    reset_buttons = context.terminal.instance.findChildren(
-        lambda x: x.name == "Reset" and x.roleName == "push button" and x.showing
-    )
+    reset_buttons = shared_index(
+        context.listener, context.terminal.instance, ("push button",)
+    ).find_all(Selector("push button", name="Reset", showing=True))
 
     for reset in reset_buttons:
         reset.click()
 
-    context.execute_steps("* Close preferences")
+    context.preferences_session.release()
 
 
 @step('Set cursor to "{set_cursor}"')
+@uses_preferences
 def set_cursor_to(context, set_cursor) -> None:
     """
     Set cursor to chosen one.
@@ -324,8 +481,10 @@ def set_cursor_to(context, set_cursor) -> None:
     ).parent.parent
     cursor.click()
 
-    context.execute_steps(f'* Left click "{set_cursor}" "menu item" in "preferences"')
-    context.execute_steps("* Close preferences")
+    context.composer.run(
+        context, f'* Left click "{set_cursor}" "menu item" in "preferences"'
+    )
+    context.preferences_session.release()
 
 
 @step('Profile named "{profile}" is selected as default')
@@ -340,10 +499,9 @@ def profile_named_is_selected_as_default(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps('* Left click "Terminal" "menu" in "terminal"')
-    context.execute_steps('* Left click "Change Profile" "menu" in "terminal"')
-    context.execute_steps(
-        f'* Item "{profile}" "radio menu item" is "checked" in "terminal"'
+    context.composer.run_macro(context, "change profile menu")
+    context.composer.run(
+        context, f'* Item "{profile}" "radio menu item" is "checked" in "terminal"'
     )
     pressKey("Esc")
 
@@ -360,10 +518,9 @@ def profile_named_is_not_selected_as_default(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps('* Left click "Terminal" "menu" in "terminal"')
-    context.execute_steps('* Left click "Change Profile" "menu" in "terminal"')
-    context.execute_steps(
-        f'* Item "{profile}" "radio menu item" is not "showing" in "terminal"'
+    context.composer.run_macro(context, "change profile menu")
+    context.composer.run(
+        context, f'* Item "{profile}" "radio menu item" is not "showing" in "terminal"'
     )
     pressKey("Esc")
 
@@ -380,10 +537,9 @@ def profile_named_is_showing(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps('* Left click "Terminal" "menu" in "terminal"')
-    context.execute_steps('* Left click "Change Profile" "menu" in "terminal"')
-    context.execute_steps(
-        f'* Item "{profile}" "radio menu item" is "showing" in "terminal"'
+    context.composer.run_macro(context, "change profile menu")
+    context.composer.run(
+        context, f'* Item "{profile}" "radio menu item" is "showing" in "terminal"'
     )
     pressKey("Esc")
 
@@ -400,15 +556,15 @@ def profile_named_is_not_showing(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps('* Left click "Terminal" "menu" in "terminal"')
-    context.execute_steps('* Left click "Change Profile" "menu" in "terminal"')
-    context.execute_steps(
-        f'* Item "{profile}" "radio menu item" is not "showing" in "terminal"'
+    context.composer.run_macro(context, "change profile menu")
+    context.composer.run(
+        context, f'* Item "{profile}" "radio menu item" is not "showing" in "terminal"'
     )
     pressKey("Esc")
 
 
 @step('Terminal size is set as columns: "{columns_size}" and rows: "{rows_size}"')
+@uses_preferences
 def terminal_size_is_set_as_columns_and_rows(context, columns_size, rows_size) -> None:
     """
     Terminal size is set as columns and rows.
@@ -442,10 +598,11 @@ def terminal_size_is_set_as_columns_and_rows(context, columns_size, rows_size) -
         (f"\nColumn expected: {rows_size}", f"\nActual column: {target_rows.text}")
     )
 
-    context.execute_steps("* Close preferences")
+    context.preferences_session.release()
 
 
 @step('Create profile named "{profile}"')
+@uses_preferences
 def create_profile_names(context, profile) -> None:
     """
     Create profile with specific name.
@@ -457,14 +614,14 @@ def create_profile_names(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps("* Open preferences")
+    context.preferences_session.open(context)
 
     # If profile is already created, skip the rest
     existing_profile = context.preferences.instance.findChildren(
         lambda x: x.name == profile and x.roleName == "label"
     )
     if existing_profile != []:
-        context.execute_steps("* Close preferences")
+        context.preferences_session.release()
         return
 
     anchor_point = (
@@ -479,11 +636,96 @@ def create_profile_names(context, profile) -> None:
     text_field = new_profile_dialog.child(roleName="text")
     text_field.text = profile
 
-    context.execute_steps('* Left click "Create" "push button" in "preferences"')
-    context.execute_steps("* Close preferences")
+    context.composer.run(
+        context, '* Left click "Create" "push button" in "preferences"'
+    )
+    context.preferences_session.release()
+
+
+@step('Seed profile named "{profile}"')
+def seed_profile_named(context, profile) -> None:
+    """
+    Create profile directly in dconf, optionally with settings from the table
+    with 'key' and 'value' headings.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param profile: Name of the profile.
+    :type profile: str
+    """
+
+    settings = {row["key"]: row["value"] for row in context.table or ()}
+    context.profiles.seed({profile: settings})
+    wait_for_server(context, (profile,))
+
+
+@step("Seed profiles")
+def seed_profiles(context) -> None:
+    """
+    Create profiles from the table with 'name' heading directly in dconf,
+    in a single transaction.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+    """
+
+    assert context.table, "Table with profile names is missing."
+    names = [row["name"] for row in context.table]
+    context.profiles.seed({x: {} for x in names})
+    wait_for_server(context, names)
+
+
+@step('Rename profile "{profile}" to "{new_name}" in dconf')
+def rename_profile_in_dconf(context, profile, new_name) -> None:
+    """
+    Rename profile directly in dconf.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param profile: Name of the profile.
+    :type profile: str
+
+    :param new_name: New name of the profile.
+    :type new_name: str
+    """
+
+    context.profiles.rename(profile, new_name)
+
+
+@step('Delete profile named "{profile}" in dconf')
+def delete_profile_in_dconf(context, profile) -> None:
+    """
+    Delete profile directly in dconf.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param profile: Name of the profile.
+    :type profile: str
+    """
+
+    context.profiles.delete(profile)
+
+
+@step('Set profile named "{profile}" as default in dconf')
+def set_profile_as_default_in_dconf(context, profile) -> None:
+    """
+    Set default profile directly in dconf.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param profile: Name of the profile.
+    :type profile: str
+    """
+
+    context.profiles.set_default(profile)
 
 
 @step('Delete profile named "{profile}"')
+@uses_preferences
 def delete_profile_named(context, profile) -> None:
     """
     Delete profile.
@@ -495,20 +737,20 @@ def delete_profile_named(context, profile) -> None:
     :type profile: str
     """
 
-    if context.sandbox.session_type == "wayland":
-        sleep(5)
-
-    context.execute_steps("* Open preferences")
-    context.execute_steps(f'* Left click "{profile}" "label" in "preferences"')
-    context.execute_steps(f'* Open toggle menu of profile: "{profile}"')
+    context.preferences_session.open(context)
+    context.composer.run(context, f'* Left click "{profile}" "label" in "preferences"')
+    context.composer.run(context, f'* Open toggle menu of profile: "{profile}"')
     pressKey("Down")
     pressKey("Down")
     pressKey("Enter")
-    context.execute_steps('* Left click "Delete" "push button" in "preferences"')
-    context.execute_steps("* Close preferences")
+    context.composer.run(
+        context, '* Left click "Delete" "push button" in "preferences"'
+    )
+    context.preferences_session.release()
 
 
 @step('Profile named "{profile}" exists')
+@uses_preferences
 def profile_named_exists(context, profile) -> None:
     """
     Verify that the given profile exists.
@@ -520,12 +762,15 @@ def profile_named_exists(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps("* Open preferences")
-    context.execute_steps(f'* Item "{profile}" "label" is "showing" in "preferences"')
-    context.execute_steps("* Close preferences")
+    context.preferences_session.open(context)
+    context.composer.run(
+        context, f'* Item "{profile}" "label" is "showing" in "preferences"'
+    )
+    context.preferences_session.release()
 
 
 @step('Profile named "{profile}" does not exist')
+@uses_preferences
 def profile_named_does_not_exist(context, profile) -> None:
     """
     Verify that the given profile does not exists.
@@ -537,11 +782,11 @@ def profile_named_does_not_exist(context, profile) -> None:
     :type profile: str
     """
 
-    context.execute_steps("* Open preferences")
-    context.execute_steps(
-        f'* Item "{profile}" "label" is not "showing" in "preferences"'
+    context.preferences_session.open(context)
+    context.composer.run(
+        context, f'* Item "{profile}" "label" is not "showing" in "preferences"'
     )
-    context.execute_steps("* Close preferences")
+    context.preferences_session.release()
 
 
 @step('Terminal contains string "{tested_string}"')
@@ -556,15 +801,18 @@ def terminal_contains_string(context, tested_string) -> None:
     :type tested_string: str
     """
 
-    text_in_terminal = context.terminal.instance.findChild(
-        lambda x: x.name == "Terminal" and x.roleName == "terminal" and x.focused
-    ).text
-
-    assert tested_string in text_in_terminal, "".join(
-        (
-            f"\nExpected string:\n '{tested_string}'",
-            f"\nFound string   :\n '{text_in_terminal}'",
-        )
+    context.terminal_text.wait_for(
+        lambda: context.terminal_text.contains(
+            get_focused_terminal(context), tested_string
+        ),
+        timeout=5,
+        message=lambda: "".join(
+            (
+                f"\nExpected string:\n '{tested_string}'",
+                "\nFound string   :\n ",
+                f"'{context.terminal_text.read(get_focused_terminal(context))}'",
+            )
+        ),
     )
 
 
@@ -580,13 +828,45 @@ def terminal_does_not_contain_string(context, tested_string) -> None:
     :type tested_string: str
     """
 
-    terminal = context.terminal.instance.findChild(
-        lambda x: x.name == "Terminal" and x.roleName == "terminal" and x.focused
-    ).text
+    context.terminal_text.wait_for(
+        lambda: not context.terminal_text.contains(
+            get_focused_terminal(context), tested_string
+        ),
+        timeout=5,
+        message="String was found. Indication of test failure.",
+    )
+
 
-    assert (
-        tested_string not in terminal
-    ), "String was found. Indication of test failure."
+@step('Terminal contains match of regex "{pattern}"')
+@step('Terminal contains {negation} match of regex "{pattern}"')
+def terminal_contains_match_of_regex(context, pattern, negation=None) -> None:
+    """
+    Verify that a line of the terminal matches the regular expression.
+
+    :param context: Holds contextual information during the running of tests.
+    :type context: <behave.runner.Context>
+
+    :param pattern: Regular expression matching within a line.
+    :type pattern: str
+
+    :param negation: Any string ('no') to negate the assertion, defaults to None.
+    :type negation: str, optional
+    """
+
+    context.terminal_text.wait_for(
+        lambda: context.terminal_text.contains(
+            get_focused_terminal(context), pattern, regex=True
+        )
+        != bool(negation),
+        timeout=5,
+        message=lambda: "".join(
+            (
+                f"\nRegex '{pattern}' {'matched' if negation else 'did not match'}",
+                " in string:\n ",
+                f"'{context.terminal_text.read(get_focused_terminal(context))}'",
+            )
+        ),
+    )
 
 
 @step("Terminal output is empty")
@@ -598,32 +878,38 @@ def terminal_output_is_empty(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    terminal = context.terminal.instance.findChild(
-        lambda x: x.name == "Terminal" and x.roleName == "terminal" and x.focused
-    ).text
+    terminal_text = ""
 
-    assert terminal.strip("\n") == "", "\n".join(
-        (
-            "\nTerminal is not empty. Indication of test failure.",
-            f"Terminal lenght : '{len(terminal)}'",
-            f"Terminal content: '{terminal}'",
-        )
+    def terminal_is_empty() -> bool:
+        nonlocal terminal_text
+        terminal_text = context.terminal_text.read(get_focused_terminal(context))
+        return terminal_text.strip("\n") == ""
+
+    context.terminal_text.wait_for(
+        terminal_is_empty,
+        timeout=5,
+        message=lambda: "\n".join(
+            (
+                "\nTerminal is not empty. Indication of test failure.",
+                f"Terminal lenght : '{len(terminal_text)}'",
+                f"Terminal content: '{terminal_text}'",
+            )
+        ),
     )
 
 
 @step("Open preferences")
+@uses_preferences
 def open_preferences(context) -> None:
     """
-    Open preferences
+    Open preferences, the ones kept open by the previous step are closed first,
+    so that the scenario checks what the reopened window shows.
 
     :param context: Holds contextual information during the running of tests.
     :type context: <behave.runner.Context>
     """
 
-    context.execute_steps('* Left click "Edit" "menu" in "terminal"')
-    context.execute_steps('* Left click "Preferences" "menu item" in "terminal"')
-    context.execute_steps('* Application "preferences" is running')
-    sleep(2)
+    context.preferences_session.open(context, reuse=False)
 
 
 @step('Terminal has "{expected_number:d}" windows')
@@ -638,26 +924,26 @@ def terminal_has_windows(context, expected_number) -> None:
     :type expected_number: str
     """
 
-    terminal_windows_count = 0
-
-    for _ in range(5):
-        terminal_windows_count = len(
-            context.terminal.instance.findChildren(
-                lambda x: ("Terminal" in x.name or "test@" in x.name)
-                and x.roleName == "frame"
-            )
+    def terminal_windows_count() -> int:
+        return context.listener.derived(
+            ("terminal", "windows"),
+            lambda: len(
+                context.terminal.instance.findChildren(
+                    lambda x: ("Terminal" in x.name or "test@" in x.name)
+                    and x.roleName == "frame"
+                )
+            ),
         )
 
-        if terminal_windows_count == expected_number:
-            return
-
-        sleep(1)
-
-    assert False, "".join(
-        (
-            f"\nNumber of expected open windows: '{expected_number}'",
-            f"\nNumber of found open windows:    '{terminal_windows_count}'",
-        )
+    context.listener.wait_for(
+        lambda: terminal_windows_count() == expected_number,
+        timeout=5,
+        message=lambda: "".join(
+            (
+                f"\nNumber of expected open windows: '{expected_number}'",
+                f"\nNumber of found open windows:    '{terminal_windows_count()}'",
+            )
+        ),
     )
 
 
@@ -685,25 +971,25 @@ def terminal_has_tabs(context, expected_number) -> None:
     :type expected_number: str
     """
 
-    terminal_tabs_count = 0
-
-    for _ in range(5):
-        terminal_tabs_count = len(
-            context.terminal.instance.findChildren(
-                lambda x: x.name == "Terminal" and x.roleName == "terminal"
-            )
+    def terminal_tabs_count() -> int:
+        return context.listener.derived(
+            ("terminal", "tabs"),
+            lambda: len(
+                context.terminal.instance.findChildren(
+                    lambda x: x.name == "Terminal" and x.roleName == "terminal"
+                )
+            ),
         )
 
-        if terminal_tabs_count == int(expected_number):
-            return
-
-        sleep(1)
-
-    assert False, "".join(
-        (
-            f"\nNumber of expected open tabs: '{expected_number}'",
-            f"\nNumber of found open tabs:    '{terminal_tabs_count}'",
-        )
+    context.listener.wait_for(
+        lambda: terminal_tabs_count() == int(expected_number),
+        timeout=5,
+        message=lambda: "".join(
+            (
+                f"\nNumber of expected open tabs: '{expected_number}'",
+                f"\nNumber of found open tabs:    '{terminal_tabs_count()}'",
+            )
+        ),
     )
 
 
@@ -720,30 +1006,29 @@ def window_is_fullscreen(context, negation=None) -> None:
     :type negation: str, optional.
     """
 
-    sleep(3)
     frame = context.terminal.instance.child(roleName="frame")
-    size_x = frame.size[0]
-    size_y = frame.size[1]
-
-    screen_size_x = context.sandbox.resolution[0]
-    screen_size_y = context.sandbox.resolution[1]
+    screen_size = tuple(context.sandbox.resolution)
 
     if negation:
-        assert (
-            screen_size_x != size_x or screen_size_y != size_y
-        ), "Window is still in fullscreen mode."
+        wait_for_geometry(
+            frame,
+            lambda _, size: size != screen_size,
+            timeout=5,
+            message="Window is still in fullscreen mode.",
+        )
     else:
-        assert screen_size_x == size_x and screen_size_y == size_y, "\n".join(
-            (
-                "\nWindow is not in fullscreen mode.",
-                f"Existing resolution='{context.sandbox.resolution}'",
-                f"X: Screen Size='{screen_size_x}' != Terminal Size='{size_x}'.",
-                f"Y: Screen Size='{screen_size_y}' != Terminal Size='{size_y}'.",
-            )
+        wait_for_geometry(
+            frame,
+            lambda position, size: size == screen_size and position[1] == 0,
+            timeout=5,
+            message="\n".join(
+                (
+                    "\nWindow is not in top aligned fullscreen mode.",
+                    f"Existing resolution='{context.sandbox.resolution}'",
+                )
+            ),
         )
 
-        assert frame.position[1] == 0, "Fullscreen frame is not top aligned."
-
 
 @step('Terminal window is now "{expected_resize}"')
 def terminal_window_is_now_of_size(context, expected_resize) -> None:
@@ -809,13 +1094,12 @@ def store_terminal_size(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    # Attempt to prevent race conditions.
-    sleep(1)
-
-    context.stored_size = Tuple(context.terminal.instance.child(roleName="frame").size)
+    frame = context.terminal.instance.child(roleName="frame")
+    context.stored_size = Tuple(wait_for_stable_geometry(frame))
 
 
 @step('Set terminal size to columns: "{columns_size}" and rows: "{rows_size}"')
+@uses_preferences
 def set_terminal_size_to_columns_and_rows(context, columns_size, rows_size) -> None:
     """
     Set terminal size to given sizes.
@@ -850,11 +1134,11 @@ def set_terminal_size_to_columns_and_rows(context, columns_size, rows_size) -> N
     # keyCombo("<Ctrl><A>")
     # typeText(rows_size)
 
-    context.execute_steps("* Close preferences")
-    sleep(1)
+    context.preferences_session.close(context)
 
 
 @step("Enable shortcuts")
+@uses_preferences
 def enable_shorcuts(context) -> None:
     """
     Enable shortcuts.
@@ -863,15 +1147,16 @@ def enable_shorcuts(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    context.execute_steps("* Open preferences")
-    context.execute_steps('* Left click "Shortcuts" "label" in "preferences"')
-    context.execute_steps(
-        '* Item "Enable shortcuts" "check box" is "checked" in "preferences"'
+    context.preferences_session.open(context)
+    context.composer.run(context, '* Left click "Shortcuts" "label" in "preferences"')
+    context.composer.run(
+        context, '* Item "Enable shortcuts" "check box" is "checked" in "preferences"'
     )
-    context.execute_steps("* Close preferences")
+    context.preferences_session.release()
 
 
 @step("Close preferences")
+@uses_preferences
 def close_preferences(context) -> None:
     """
     Close preferences.
@@ -880,13 +1165,7 @@ def close_preferences(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    target_frame = context.preferences.instance.findChild(
-        lambda x: "Preferences" in x.name and x.roleName == "frame"
-    )
-
-    target_frame.findChildren(
-        lambda x: x.name == "Close" and x.roleName == "push button" and x.showing
-    )[-1].click()
+    context.preferences_session.close(context)
 
 
 @step('Find "{find_string}"')
@@ -903,9 +1182,16 @@ def find_string_in_find_frame_dialog(context, find_string) -> None:
 
     find_text_field = context.terminal.instance.child("Search", "text")
     find_text_field.text = find_string
-    sleep(1)
+    wait_for_node_property(find_text_field, "text", find_string)
     pressKey("Enter")
-    sleep(1)
+
+    # Search dialog holds the focus, the highlight is the terminal selection.
+    terminal = context.terminal.instance.child("Terminal", "terminal")
+    wait_until(
+        lambda: terminal.queryText().getNSelections() > 0,
+        timeout=5,
+        message=f"String '{find_string}' was not highlighted.",
+    )
 
 
 @step("Prepare two Tabs for testing")
@@ -917,21 +1203,9 @@ def prepare_two_tabs_for_testing(context) -> None:
     :type context: <behave.runner.Context>
     """
 
-    context.execute_steps('* Left click "Terminal" "menu" in "terminal"')
-    context.execute_steps('* Left click "Set Title" "menu item" in "terminal"')
-    context.execute_steps('* Item "Set Title" "alert" is "showing" in "terminal"')
-    context.execute_steps('* Type text: "tab-1"')
-    context.execute_steps('* Left click "OK" "push button" in "terminal"')
-    context.execute_steps('* Type text: "tab-1"')
-    context.execute_steps('* Press key: "Enter"')
+    context.composer.run_macro(context, "set tab title", title="tab-1")
     keyCombo("<Ctrl><Shift><T>")
-    context.execute_steps('* Left click "Terminal" "menu" in "terminal"')
-    context.execute_steps('* Left click "Set Title" "menu item" in "terminal"')
-    context.execute_steps('* Item "Set Title" "alert" is "showing" in "terminal"')
-    context.execute_steps('* Type text: "tab-2"')
-    context.execute_steps('* Left click "OK" "push button" in "terminal"')
-    context.execute_steps('* Type text: "tab-2"')
-    context.execute_steps('* Press key: "Enter"')
+    context.composer.run_macro(context, "set tab title", title="tab-2")
 
 
 @step('Tab "{tab_name}" was targeted and contains string "{given_string}"')
@@ -949,21 +1223,23 @@ def tab_was_targeted_and_contains_string(context, tab_name, given_string) -> Non
     :type given_string: str
     """
 
-    # Attempt to prevent race conditions.
-    sleep(1)
-
-    target_tab = context.terminal.instance.child(tab_name, "page tab")
-    tab_string_content = target_tab.child("Terminal", "terminal").text
-
-    assert given_string in tab_string_content, "".join(
-        (
-            f"\nExpected string to be found: '{given_string}'",
-            f"\nString that was found in tab: '{tab_string_content}'",
-        )
+    context.terminal_text.wait_for(
+        lambda: context.terminal_text.contains(
+            get_tab_terminal(context, tab_name), given_string
+        ),
+        timeout=5,
+        message=lambda: "".join(
+            (
+                f"\nExpected string to be found: '{given_string}'",
+                "\nString that was found in tab: ",
+                f"'{context.terminal_text.read(get_tab_terminal(context, tab_name))}'",
+            )
+        ),
     )
 
 
 @step('Left click on "{page_tab_name}" page tab and make sure the tab was selected')
+@uses_preferences
 def make_sure_page_tab_selection_is_immune_to_slow_machines(
     context, page_tab_name
 ) -> None:
@@ -978,19 +1254,23 @@ def make_sure_page_tab_selection_is_immune_to_slow_machines(
     """
 
     page_tab = context.preferences.instance.child(page_tab_name, "page tab")
-    page_tab.click()
 
     for _ in range(5):
-        if not page_tab.selected:
-            page_tab.click()
-            sleep(1)
-        else:
+        if context.listener.state_of(page_tab, "selected"):
+            return
+
+        page_tab.click()
+        try:
+            context.listener.wait_for_state(page_tab, "selected", timeout=1)
             return
+        except WaitTimeout:
+            LOGGING.info(f"Page tab '{page_tab_name}' not selected yet, retrying.")
 
     assert False, "".join((f"Page tab '{page_tab_name}' failed to be selected."))
 
 
 @step('Set color name to: "{color_name}"')
+@uses_preferences
 def set_color_name_to(context, color_name) -> None:
     """
     Set color to given color name.
@@ -1012,4 +1292,4 @@ def set_color_name_to(context, color_name) -> None:
     color_name_field.click()
 
     color_name_field.text = color_name
-    sleep(1)
+    wait_for_node_property(color_name_field, "text", color_name)
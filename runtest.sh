@@ -11,6 +11,14 @@ is_known_to_fail() {
   [[ $NON_REPEATING_TESTS =~ (^|[[:space:]])$1($|[[:space:]]) ]] && echo "0" || echo "1"
 }
 
+# Failed scenarios are retried by behave itself, see 'autoretry' in behave.ini.
+# Whole run is repeated only when the session or the setup did not work at all.
+is_infrastructure_failure() {
+  if [ ! -s $TEST_REPORT_FILE ]; then echo "0"; return; fi
+  if [ $1 -ne 1 ]; then echo "0"; return; fi
+  grep -q "Failed setup in Before All" $TEST_REPORT_FILE && echo "0" || echo "1"
+}
+
 
 # Opencv setup for x86_64.
 if [[ $(arch) == "x86_64" ]] && [[ ! -e /tmp/opencv_setup_done ]]; then
@@ -28,20 +36,27 @@ if [ ! -e /tmp/qecore_setup_done ]; then
 fi
 
 
-# In attempt to reduce false negatives, repeat tests that are not expected to fail.
+# Repeat runs broken by infrastructure, test failures were already retried by behave.
 MAX_FAIL_COUNT=2
+# Tests expected to fail are not retried by behave either.
+BEHAVE_RETRY=""
+[ "$(is_known_to_fail $1)" -eq 0 ] && BEHAVE_RETRY="-D autoretry=1"
 for i in $(seq 1 1 $MAX_FAIL_COUNT); do
 
+  # Report of a previous run must not be mistaken for a result of this one.
+  rm -f $TEST_REPORT_FILE
+
   if [[ $(arch) == "x86_64" ]]; then
     # For x86_64 respect the system setting.
-    sudo -u test qecore-headless --keep-max "behave -t $1 -k -f html-pretty -o $TEST_REPORT_FILE -f plain"; rc=$?
+    sudo -u test qecore-headless --keep-max "behave -t $1 -k -f html-pretty -o $TEST_REPORT_FILE -f plain $BEHAVE_RETRY"; rc=$?
   else
     # Fixing xorg on anything else.
-    sudo -u test qecore-headless --session-type xorg --keep-max "behave -t $1 -k -f html-pretty -o $TEST_REPORT_FILE -f plain"; rc=$?
+    sudo -u test qecore-headless --session-type xorg --keep-max "behave -t $1 -k -f html-pretty -o $TEST_REPORT_FILE -f plain $BEHAVE_RETRY"; rc=$?
   fi
 
   [ $rc -eq 0 -o $rc -eq 77 ] && break
   [ "$(is_known_to_fail $1)" -eq 0 ] && break
+  [ "$(is_infrastructure_failure $rc)" -eq 1 ] && break
 
   sleep 1
   systemctl stop gdm
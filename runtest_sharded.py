@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Run tests from mapper.yaml in parallel isolated headless sessions.
+
+Every shard is its own session bus started by dbus-run-session with its own
+XDG runtime, config, cache and data directories, so dconf, AT-SPI and the
+compositor are private to the shard. Inside the session a headless gnome-shell
+is started and tests are taken one by one from the shared queue of the parent.
+
+Reports of all tests are merged into one html-pretty report and exit codes
+are merged the same way as runtest.sh reports them:
+0 all passed, 77 all skipped, 1 anything failed.
+
+Usage:
+    python3 runtest_sharded.py [-j SHARDS] [-o REPORT] [-D NAME=VALUE] [TEST ...]
+    python3 runtest_sharded.py --compare-warm [TEST ...]
+
+Tests are behave tags, for --compare-warm pass feature tags like 'basic_feature'
+so that scenarios share one behave process and the server can be reused.
+"""
+
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+MAPPER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapper.yaml")
+SHARDS_DIRECTORY = "/tmp/shards"
+
+# Repeat runs broken by infrastructure, test failures are retried by behave.
+MAX_FAIL_COUNT = 2
+
+# Output files of behave.ini userdata, placed to the shard directory per test.
+SHARD_OUTPUTS = (
+    ("timing_output", "step_timing.jsonl"),
+    ("benchmark_output", "benchmark_results.json"),
+    ("shell_status_file", "shell_status"),
+)
+
+RESOLUTION = "1920x1080"
+SESSION_START_TIMEOUT = 60
+
+
+def mapper_tests(mapper_file=MAPPER_FILE) -> list:
+    """
+    Get test names from the testmapper list.
+
+    :param mapper_file: Path to mapper.yaml, defaults to MAPPER_FILE.
+    :type mapper_file: str, optional
+
+    :return: Test names in mapper order.
+    :rtype: list
+    """
+
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    with open(mapper_file, "r", encoding="utf-8") as mapper:
+        testmapper = yaml.safe_load(mapper)["testmapper"]
+
+    return [next(iter(test)) if isinstance(test, dict) else test for test in testmapper]
+
+
+def merge_exit_codes(exit_codes) -> int:
+    """
+    Merge exit codes of all tests.
+
+    :param exit_codes: Exit codes of the tests.
+    :type exit_codes: iterable
+
+    :return: 1 if anything failed, 77 if everything was skipped, 0 otherwise.
+    :rtype: int
+    """
+
+    exit_codes = list(exit_codes)
+
+    if any(rc not in (0, 77) for rc in exit_codes):
+        return 1
+
+    if exit_codes and all(rc == 77 for rc in exit_codes):
+        return 77
+
+    return 0
+
+
+def merge_reports(report_files, output_file) -> None:
+    """
+    Merge html-pretty reports into one, bodies are appended to the first report.
+
+    :param report_files: Paths to the reports.
+    :type report_files: iterable
+
+    :param output_file: Path to the merged report.
+    :type output_file: str
+    """
+
+    merged = None
+    bodies = []
+
+    for report_file in report_files:
+        if not os.path.isfile(report_file):
+            continue
+
+        with open(report_file, "r", encoding="utf-8") as report:
+            content = report.read()
+
+        if merged is None:
+            merged = content
+            continue
+
+        start = content.find(">", content.find("<body")) + 1
+        end = content.rfind("</body>")
+        if start > 0 and end > start:
+            bodies.append(content[start:end])
+
+    if merged is None:
+        return
+
+    end = merged.rfind("</body>")
+    merged = merged[:end] + "".join(bodies) + merged[end:]
+
+    with open(output_file, "w", encoding="utf-8") as output:
+        output.write(merged)
+
+
+def infrastructure_failure(exit_code, report_file) -> bool:
+    """
+    Check if the run failed for other reasons than failed scenarios.
+
+    Failed scenarios are already retried by behave, see 'autoretry' in behave.ini.
+
+    :param exit_code: Exit code of behave.
+    :type exit_code: int
+
+    :param report_file: Path to the html-pretty report of the run.
+    :type report_file: str
+
+    :rtype: bool
+    """
+
+    if exit_code != 1 or not os.path.isfile(report_file):
+        return True
+
+    with open(report_file, "r", encoding="utf-8") as report:
+        content = report.read()
+
+    return not content or "Failed setup in Before All" in content
+
+
+def shard_environment(shard_directory) -> dict:
+    """
+    Environment of a shard with private XDG directories.
+
+    :param shard_directory: Root directory of the shard.
+    :type shard_directory: str
+
+    :rtype: dict
+    """
+
+    environment = dict(os.environ)
+    for variable, name in (
+        ("XDG_RUNTIME_DIR", "runtime"),
+        ("XDG_CONFIG_HOME", "config"),
+        ("XDG_CACHE_HOME", "cache"),
+        ("XDG_DATA_HOME", "data"),
+    ):
+        path = os.path.join(shard_directory, name)
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        environment[variable] = path
+
+    for variable in ("DISPLAY", "WAYLAND_DISPLAY", "DBUS_SESSION_BUS_ADDRESS"):
+        environment.pop(variable, None)
+
+    environment["XDG_SESSION_TYPE"] = "wayland"
+    environment["WAYLAND_DISPLAY"] = "wayland-shard"
+
+    return environment
+
+
+def output_defines(shard_directory, test) -> list:
+    """
+    Behave userdata definitions of output files private to the shard and test.
+
+    Files of the defaults in behave.ini are shared by all processes and some
+    of them are truncated by every behave run.
+
+    :param shard_directory: Root directory of the shard.
+    :type shard_directory: str
+
+    :param test: Test name.
+    :type test: str
+
+    :return: Definitions 'name=value'.
+    :rtype: list
+    """
+
+    return [
+        f"{name}={os.path.join(shard_directory, f'{test}_{file_name}')}"
+        for name, file_name in SHARD_OUTPUTS
+    ]
+
+
+class Shard(threading.Thread):
+    """
+    Parent side of one shard, feeds tests from the queue to the session worker.
+    """
+
+    def __init__(self, number, tests, results, defines=()) -> None:
+        """
+        :param number: Number of the shard.
+        :type number: int
+
+        :param tests: Queue of test names shared by the shards.
+        :type tests: <queue.Queue>
+
+        :param results: Test names mapped to exit codes, shared by the shards.
+        :type results: dict
+
+        :param defines: Behave userdata definitions 'name=value', defaults to ().
+        :type defines: iterable, optional
+        """
+
+        super().__init__(name=f"shard-{number}")
+        self.number = number
+        self.tests = tests
+        self.results = results
+        self.defines = tuple(defines)
+        self.directory = os.path.join(SHARDS_DIRECTORY, f"shard_{number}")
+
+    def run(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+
+        session_log_file = os.path.join(self.directory, "session.log")
+        with open(session_log_file, "w", encoding="utf-8") as session_log:
+            worker = subprocess.Popen(  # pylint: disable=consider-using-with
+                [
+                    "dbus-run-session",
+                    "--",
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--worker",
+                    self.directory,
+                    *(f"--define={define}" for define in self.defines),
+                ],
+                env=shard_environment(self.directory),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=session_log,
+                text=True,
+                bufsize=1,
+            )
+
+            # Worker reports readiness of the session or its failure.
+            ready = worker.stdout.readline().strip() == "ready"
+
+            while ready:
+                try:
+                    test = self.tests.get_nowait()
+                except queue.Empty:
+                    break
+
+                worker.stdin.write(f"{test}\n")
+                answer = worker.stdout.readline().strip()
+                self.results[test] = int(answer) if answer.isdigit() else 1
+                print(f"[{self.name}] {test}: {self.results[test]}", flush=True)
+
+                # Session died, the rest of the queue is left to other shards.
+                if not answer:
+                    break
+
+            worker.stdin.close()
+            worker.wait()
+
+        if not ready:
+            print(f"[{self.name}] session did not start, see session.log", flush=True)
+
+
+def worker(shard_directory, defines=()) -> int:
+    """
+    Session side of one shard, runs tests read from stdin.
+
+    :param shard_directory: Root directory of the shard.
+    :type shard_directory: str
+
+    :param defines: Behave userdata definitions 'name=value', defaults to ().
+    :type defines: iterable, optional
+
+    :return: Exit code.
+    :rtype: int
+    """
+
+    subprocess.run(
+        [
+            "dconf",
+            "write",
+            "/org/gnome/desktop/interface/toolkit-accessibility",
+            "true",
+        ],
+        check=False,
+    )
+
+    shell = subprocess.Popen(  # pylint: disable=consider-using-with
+        [
+            "gnome-shell",
+            "--headless",
+            "--wayland",
+            "--wayland-display",
+            os.environ["WAYLAND_DISPLAY"],
+            "--virtual-monitor",
+            RESOLUTION,
+        ],
+        stdout=sys.stderr,
+        stderr=sys.stderr,
+    )
+
+    socket = os.path.join(os.environ["XDG_RUNTIME_DIR"], os.environ["WAYLAND_DISPLAY"])
+    deadline = time.monotonic() + SESSION_START_TIMEOUT
+    while not os.path.exists(socket) and time.monotonic() < deadline:
+        time.sleep(0.5)
+
+    if not os.path.exists(socket):
+        shell.terminate()
+        print("failed", flush=True)
+        return 1
+
+    print("ready", flush=True)
+
+    for line in sys.stdin:
+        test = line.strip()
+        report_file = os.path.join(shard_directory, f"report_{test}.html")
+        test_log_file = os.path.join(shard_directory, f"{test}.log")
+
+        for _ in range(MAX_FAIL_COUNT):
+            # Report of a previous run must not be mistaken for a result of this one.
+            if os.path.isfile(report_file):
+                os.remove(report_file)
+
+            with open(test_log_file, "a", encoding="utf-8") as test_log:
+                rc = subprocess.run(
+                    [
+                        "behave",
+                        "-t",
+                        test,
+                        "-k",
+                        "-f",
+                        "html-pretty",
+                        "-o",
+                        report_file,
+                        "-f",
+                        "plain",
+                        *(
+                            f"-D{define}"
+                            for define in output_defines(shard_directory, test)
+                            + list(defines)
+                        ),
+                    ],
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    stdout=test_log,
+                    stderr=test_log,
+                    check=False,
+                ).returncode
+
+            if rc in (0, 77) or not infrastructure_failure(rc, report_file):
+                break
+
+        print(rc, flush=True)
+
+    shell.terminate()
+    shell.wait()
+    return 0
+
+
+def run_suite(test_names, shard_count, output, defines=()) -> tuple:
+    """
+    Distribute the tests to the shards and merge the results.
+
+    :param test_names: Tests to run.
+    :type test_names: list
+
+    :param shard_count: Number of parallel shards.
+    :type shard_count: int
+
+    :param output: Path to the merged report.
+    :type output: str
+
+    :param defines: Behave userdata definitions 'name=value', defaults to ().
+    :type defines: iterable, optional
+
+    :return: Merged exit code and wall time in seconds.
+    :rtype: tuple
+    """
+
+    tests = queue.Queue()
+    for test in test_names:
+        tests.put(test)
+
+    results = {}
+    start = time.monotonic()
+    shards = [
+        Shard(number, tests, results, defines)
+        for number in range(min(shard_count, len(test_names)))
+    ]
+    for shard in shards:
+        shard.start()
+    for shard in shards:
+        shard.join()
+    wall_time = time.monotonic() - start
+
+    # Tests left in the queue were not run because sessions failed to start.
+    while not tests.empty():
+        results[tests.get_nowait()] = 1
+
+    merge_reports(
+        [
+            os.path.join(shard.directory, f"report_{test}.html")
+            for test in test_names
+            for shard in shards
+        ],
+        output,
+    )
+
+    failed = sorted(test for test, rc in results.items() if rc not in (0, 77))
+    print(
+        "\n".join(
+            (
+                f"Ran {len(results)} tests in {len(shards)} shards",
+                f"in {wall_time:.0f} seconds.",
+                f"Failed: {failed}",
+                f"Report: {output}",
+            )
+        ),
+        flush=True,
+    )
+
+    return merge_exit_codes(results.get(test, 1) for test in test_names), wall_time
+
+
+def main() -> int:
+    """
+    Parse arguments and run the suite, twice when comparing the warm mode.
+
+    :return: Merged exit code.
+    :rtype: int
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("tests", nargs="*", help="tests to run, all from mapper.yaml")
+    parser.add_argument(
+        "-j", "--shards", type=int, default=os.cpu_count() or 1, help="parallel shards"
+    )
+    parser.add_argument(
+        "-o", "--output", default="/tmp/report_sharded.html", help="merged report"
+    )
+    parser.add_argument(
+        "-D",
+        "--define",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="behave userdata definition passed to every test",
+    )
+    parser.add_argument(
+        "--compare-warm",
+        action="store_true",
+        help="run the suite cold and with warm_terminal, compare the wall time",
+    )
+    parser.add_argument("--worker", metavar="DIRECTORY", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.worker:
+        return worker(arguments.worker, arguments.define)
+
+    test_names = arguments.tests or mapper_tests()
+
+    if not arguments.compare_warm:
+        return run_suite(
+            test_names, arguments.shards, arguments.output, arguments.define
+        )[0]
+
+    exit_codes = []
+    wall_times = {}
+    for mode in ("false", "true"):
+        output = arguments.output.replace(".html", f"_warm_{mode}.html")
+        exit_code, wall_times[mode] = run_suite(
+            test_names,
+            arguments.shards,
+            output,
+            arguments.define + [f"warm_terminal={mode}"],
+        )
+        exit_codes.append(exit_code)
+
+    print(
+        "\n".join(
+            (
+                f"Cold suite wall time: {wall_times['false']:.0f} seconds.",
+                f"Warm suite wall time: {wall_times['true']:.0f} seconds.",
+                f"Speedup: {wall_times['false'] / max(wall_times['true'], 1):.2f}x",
+            )
+        )
+    )
+
+    return merge_exit_codes(exit_codes)
+
+
+if __name__ == "__main__":
+    sys.exit(main())